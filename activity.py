@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Discord snowflakes count milliseconds from 2015-01-01T00:00:00Z
+DISCORD_EPOCH_MS = 1420070400000
+SECONDS_PER_DAY = 86400
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def snowflakes_to_epoch(ids):
+    """Convert an array of snowflake ids to epoch seconds"""
+    ids = np.asarray(ids, dtype=np.uint64)
+    return ((ids >> np.uint64(22)) + np.uint64(DISCORD_EPOCH_MS)) // np.uint64(1000)
+
+
+def epoch_to_snowflake(seconds):
+    """Get the smallest snowflake id created at or after an epoch time"""
+    return max(0, int(seconds * 1000) - DISCORD_EPOCH_MS) << 22
+
+
+def activity_histograms(ids, start, end):
+    """Bucket message ids by hour of day, weekday and day between start and end (epoch seconds, UTC)
+
+    Returns numpy count arrays: 24 hours, 7 weekdays (Monday first) and one
+    bucket per day starting at the day containing start.
+    """
+    seconds = snowflakes_to_epoch(ids).astype(np.int64)
+    seconds = seconds[(seconds >= start) & (seconds < end)]
+    days = seconds // SECONDS_PER_DAY
+    first_day = int(start) // SECONDS_PER_DAY
+    day_count = (int(end) - 1) // SECONDS_PER_DAY - first_day + 1
+    return {
+        "hour": np.bincount((seconds % SECONDS_PER_DAY) // 3600, minlength=24),
+        # 1970-01-01 was a Thursday
+        "weekday": np.bincount((days + 3) % 7, minlength=7),
+        "day": np.bincount(days - first_day, minlength=day_count)[:day_count],
+        "first_day": first_day,
+        "total": int(seconds.size)
+    }
+
+
+def render_bars(labels, counts, width=20):
+    """Render labelled counts as one text bar per line"""
+    peak = int(counts.max()) if counts.size else 0
+    lines = []
+    for label, count in zip(labels, counts):
+        bar = "█" * (round(int(count) * width / peak) if peak else 0)
+        lines.append(f"`{label}` {bar} {int(count)}")
+    return "\n".join(lines)
+
+
+def render_histograms(histograms):
+    """Render the hour, weekday and day histograms as message text"""
+    day_labels = [
+        datetime.fromtimestamp((histograms["first_day"] + i) * SECONDS_PER_DAY, timezone.utc).strftime("%m-%d")
+        for i in range(len(histograms["day"]))
+    ]
+    return (
+        "**Messages per hour (UTC):**\n"
+        + render_bars([f"{hour:02d}:00" for hour in range(24)], histograms["hour"])
+        + "\n\n**Messages per weekday:**\n"
+        + render_bars(WEEKDAYS, histograms["weekday"])
+        + "\n\n**Messages per day:**\n"
+        + render_bars(day_labels, histograms["day"])
+    )
@@ -0,0 +1,330 @@
+"""One-pass analyzer for large message exports
+
+Summarizes JSON array exports (from DiscordScraper.save_data), NDJSON and
+gzip NDJSON files without loading them into memory:
+
+    python analyze_export.py messages_20240101_120000.ndjson.gz
+    python analyze_export.py archive.json --workers 8 --json
+
+Plain files are memory-mapped and split at record boundaries into pieces
+that worker processes parse in parallel; gzip files are decompressed in
+one stream and parsed in batches by the workers.
+"""
+import argparse
+import codecs
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from hyperloglog import HyperLogLog
+from records import MessageRecord
+
+# Bytes decoded at a time while parsing a JSON array
+READ_CHUNK = 1024 * 1024
+# Lines per batch handed to a worker for gzip NDJSON
+LINE_BATCH = 20000
+# Smallest piece of a memory-mapped file given to one worker
+MIN_PIECE = 4 * 1024 * 1024
+
+
+class ExportSummary:
+    def __init__(self):
+        """Mergeable one-pass totals over message records"""
+        self.records = 0
+        self.with_content = 0
+        self.characters = 0
+        self.attachments = 0
+        self.embeds = 0
+        self.reactions = 0
+        self.first = None
+        self.last = None
+        self.authors = HyperLogLog()
+        self.pending_authors = []
+
+    def add(self, record):
+        """Count one record (a dict in the MessageRecord.to_dict format)"""
+        if not isinstance(record, dict):
+            return
+        self.records += 1
+        content = record.get("content") or ""
+        if content:
+            self.with_content += 1
+            self.characters += len(content)
+        self.attachments += _amount(record.get("attachments"))
+        self.embeds += _amount(record.get("embeds"))
+        self.reactions += _amount(record.get("reactions"))
+        created = MessageRecord.parse_timestamp(record.get("timestamp"))
+        if isinstance(created, float):
+            self.first = created if self.first is None else min(self.first, created)
+            self.last = created if self.last is None else max(self.last, created)
+        author = _author_key(record)
+        if author is not None:
+            self.pending_authors.append(author)
+            if len(self.pending_authors) >= 10000:
+                self.flush_authors()
+
+    def flush_authors(self):
+        """Hash buffered author ids into the distinct-author sketch"""
+        self.authors.update(self.pending_authors)
+        self.pending_authors = []
+
+    def merge(self, other):
+        """Fold another summary (e.g. from a worker) into this one"""
+        other.flush_authors()
+        self.flush_authors()
+        self.records += other.records
+        self.with_content += other.with_content
+        self.characters += other.characters
+        self.attachments += other.attachments
+        self.embeds += other.embeds
+        self.reactions += other.reactions
+        for key, pick in (("first", min), ("last", max)):
+            values = [value for value in (getattr(self, key), getattr(other, key)) if value is not None]
+            setattr(self, key, pick(values) if values else None)
+        self.authors.merge(other.authors)
+        return self
+
+    def report(self):
+        """Get the totals as a JSON-serializable dict"""
+        self.flush_authors()
+        return {
+            "records": self.records,
+            "records_with_content": self.with_content,
+            "average_length": round(self.characters / self.with_content, 1) if self.with_content else 0.0,
+            "unique_authors": self.authors.count(),
+            "unique_authors_error": round(2 * self.authors.error, 4),
+            "total_attachments": self.attachments,
+            "total_embeds": self.embeds,
+            "total_reactions": self.reactions,
+            "first_message": _isoformat(self.first),
+            "last_message": _isoformat(self.last)
+        }
+
+    def __getstate__(self):
+        self.flush_authors()
+        return self.__dict__
+
+
+def _amount(value):
+    """Count field that may be a number or a list of items"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, list):
+        return len(value)
+    return 0
+
+
+def _author_key(record):
+    """Integer key for a record's author: the user id, or a hash of the username"""
+    author_id = record.get("author_id")
+    if author_id is not None:
+        try:
+            return int(author_id)
+        except (TypeError, ValueError):
+            pass
+    name = record.get("username")
+    if name:
+        return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big")
+    return None
+
+
+def _isoformat(seconds):
+    """Format epoch seconds as ISO 8601, or None"""
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat() if seconds is not None else None
+
+
+def export_format(path):
+    """Guess the export format from the filename: "json", "ndjson" or "ndjson.gz\""""
+    name = path.lower()
+    if name.endswith((".ndjson.gz", ".jsonl.gz")):
+        return "ndjson.gz"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "json"
+
+
+def find_record_array(mm):
+    """Find where the record array of a JSON export starts and how its elements are separated
+
+    Exports are either a top-level array or an object holding the records
+    under "messages" (user_info). Returns (offset just after the "[",
+    separator) where separator is the newline-plus-indent that precedes each
+    element of an indented array, or None for compact JSON.
+    """
+    start = 0
+    while start < len(mm) and mm[start:start + 1].isspace():
+        start += 1
+    if mm[start:start + 1] == b"[":
+        offset = start + 1
+    elif mm[start:start + 1] == b"{":
+        # A bare quote can't occur inside a JSON string, so this only matches a key
+        key = max(mm.find(b'"messages": ['), mm.find(b'"messages":['))
+        if key == -1:
+            raise ValueError("No message array found in the JSON export")
+        offset = mm.find(b"[", key) + 1
+    else:
+        raise ValueError("Not a JSON array or object export")
+    first = offset
+    while first < len(mm) and mm[first:first + 1].isspace():
+        first += 1
+    newline = mm.rfind(b"\n", offset, first)
+    separator = bytes(mm[newline:first]) + b"{" if newline != -1 else None
+    return offset, separator
+
+
+def split_pieces(mm, start, separator, pieces):
+    """Split mm[start:] into up to pieces ranges that begin at a separator"""
+    size = len(mm) - start
+    piece_size = max(MIN_PIECE, size // max(1, pieces))
+    bounds = [start]
+    if separator is not None:
+        position = start + piece_size
+        while position < len(mm):
+            found = mm.find(separator, position)
+            if found == -1:
+                break
+            bounds.append(found)
+            position = found + piece_size
+    bounds.append(len(mm))
+    return list(zip(bounds, bounds[1:]))
+
+
+def iter_json_array(mm, start, end, chunk=READ_CHUNK):
+    """Parse the elements of a JSON array in mm[start:end] incrementally
+
+    start must be inside the array, before an element; parsing stops at the
+    closing "]" or at end. Only about one chunk is decoded at a time.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    offset = start
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+                yield record
+                continue
+            except json.JSONDecodeError:
+                if offset >= end:
+                    raise
+        elif offset >= end:
+            return
+        # The next element is incomplete: decode more of the file
+        data = mm[offset:min(end, offset + chunk)]
+        offset += len(data)
+        buffer = buffer[position:] + utf8.decode(data, final=offset >= end)
+        position = 0
+
+
+def iter_ndjson(mm, start, end):
+    """Parse the JSON lines in mm[start:end]"""
+    position = start
+    while position < end:
+        newline = mm.find(b"\n", position, end)
+        if newline == -1:
+            newline = end
+        line = mm[position:newline]
+        if line.strip():
+            yield json.loads(line)
+        position = newline + 1
+
+
+def analyze_piece(path, kind, start, end):
+    """Summarize one byte range of a plain export (runs in a worker process)"""
+    summary = ExportSummary()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        records = iter_ndjson(mm, start, end) if kind == "ndjson" else iter_json_array(mm, start, end)
+        for record in records:
+            summary.add(record)
+    return summary
+
+
+def analyze_lines(lines):
+    """Summarize a batch of NDJSON lines (runs in a worker process)"""
+    summary = ExportSummary()
+    for line in lines:
+        if line.strip():
+            summary.add(json.loads(line))
+    return summary
+
+
+def analyze_file(path, workers=None):
+    """Summarize an export in one pass using up to workers processes"""
+    workers = workers or os.cpu_count() or 1
+    kind = export_format(path)
+    summary = ExportSummary()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if kind == "ndjson.gz":
+            # Decompression is sequential; keep a bounded number of batches in flight
+            in_flight = deque()
+            with gzip.open(path, "rb") as f:
+                batch = []
+                for line in f:
+                    batch.append(line)
+                    if len(batch) >= LINE_BATCH:
+                        in_flight.append(executor.submit(analyze_lines, batch))
+                        batch = []
+                        if len(in_flight) >= 2 * workers:
+                            summary.merge(in_flight.popleft().result())
+                if batch:
+                    in_flight.append(executor.submit(analyze_lines, batch))
+            for future in in_flight:
+                summary.merge(future.result())
+            return summary
+
+        if os.path.getsize(path) == 0:
+            return summary
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if kind == "ndjson":
+                start, separator = 0, b"\n"
+            else:
+                start, separator = find_record_array(mm)
+            pieces = split_pieces(mm, start, separator, workers * 4)
+        futures = [executor.submit(analyze_piece, path, kind, piece_start, piece_end) for piece_start, piece_end in pieces]
+        for future in futures:
+            summary.merge(future.result())
+    return summary
+
+
+def main():
+    """Analyze the export files given on the command line"""
+    parser = argparse.ArgumentParser(description="Summarize large JSON/NDJSON message exports in one pass")
+    parser.add_argument("paths", nargs="+", help="export files (.json, .ndjson, .ndjson.gz)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total = ExportSummary()
+    for path in args.paths:
+        total.merge(analyze_file(path, args.workers))
+    report = total.report()
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        if key == "unique_authors":
+            value = f"≈{value} (±{report['unique_authors_error']:.2%})"
+        elif key == "unique_authors_error":
+            continue
+        print(f"{key.replace('_', ' ').capitalize():<22} {value}")
+    rate = report["records"] / elapsed if elapsed else 0
+    print(f"Analyzed {len(args.paths)} file(s) in {elapsed:.1f}s ({rate:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import gzip
+import json
+import os
+import re
+import struct
+
+from records import MessageRecord, record_default
+
+# Sealed segment files end with the footer length and this marker
+FOOTER_MAGIC = b"DSARCH01"
+TRAILER = struct.Struct("<8sQ")
+# Uncompressed bytes per independently readable block of a sealed segment
+BLOCK_BYTES = 256 * 1024
+# Active segment size that triggers rotation into a sealed segment
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+SEGMENT_RE = re.compile(r"segment-(\d+)\.(seg|active\.ndjson)$")
+
+
+class ArchiveWriter:
+    """Append-only, crash-safe message archive
+
+    An archive is a directory of segments. New records are appended as NDJSON
+    lines to the active segment and fsynced, so a save costs only the new
+    data. Once the active segment reaches segment_bytes it is sealed: its
+    records are rewritten into blocks (gzip-compressed unless compression is
+    None) followed by a JSON footer with the record count, time range and
+    per-block byte offsets. The sealed file is written under a temporary
+    name and atomically renamed into place. A crash at any point leaves
+    either the old or the new state; a torn last line of the active segment
+    is dropped when the archive is reopened. One writer per archive.
+    """
+
+    def __init__(self, path, compression="gzip", segment_bytes=SEGMENT_BYTES, block_bytes=BLOCK_BYTES):
+        """Open (or create) the archive directory at path and recover from any crash"""
+        self.path = path
+        self.compression = compression
+        self.segment_bytes = segment_bytes
+        self.block_bytes = block_bytes
+        os.makedirs(path, exist_ok=True)
+        self.sequence = self.recover()
+
+    def segment_path(self, sequence, active=False):
+        """Path of a sealed or active segment"""
+        suffix = "active.ndjson" if active else "seg"
+        return os.path.join(self.path, f"segment-{sequence:06d}.{suffix}")
+
+    def recover(self):
+        """Clean up after an interrupted save or rotation; returns the active sequence number"""
+        sealed = set()
+        active = []
+        for name in os.listdir(self.path):
+            if name.endswith(".tmp"):
+                # Half-written sealed segment; its records are still in the active segment
+                os.remove(os.path.join(self.path, name))
+                continue
+            match = SEGMENT_RE.match(name)
+            if match and match.group(2) == "seg":
+                sealed.add(int(match.group(1)))
+            elif match:
+                active.append(int(match.group(1)))
+        for sequence in active:
+            if sequence in sealed:
+                # Crashed after sealing but before removing the active segment
+                os.remove(self.segment_path(sequence, active=True))
+            else:
+                _truncate_torn_line(self.segment_path(sequence, active=True))
+        pending = [sequence for sequence in active if sequence not in sealed]
+        if pending:
+            return max(pending)
+        return max(sealed, default=0) + 1
+
+    def append(self, records):
+        """Append records (dicts or MessageRecords) durably; returns the number written"""
+        lines = [
+            json.dumps(record, ensure_ascii=False, default=record_default).encode("utf-8") + b"\n"
+            for record in records
+        ]
+        if not lines:
+            return 0
+        active = self.segment_path(self.sequence, active=True)
+        with open(active, "ab") as f:
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        if size >= self.segment_bytes:
+            self.rotate()
+        return len(lines)
+
+    def rotate(self):
+        """Seal the active segment and start a new one"""
+        active = self.segment_path(self.sequence, active=True)
+        if not os.path.exists(active) or os.path.getsize(active) == 0:
+            return
+        sealed = self.segment_path(self.sequence)
+        temp_path = f"{sealed}.tmp"
+        with open(active, "rb") as source, open(temp_path, "wb") as target:
+            footer = _write_blocks(source, target, self.compression, self.block_bytes)
+            encoded = json.dumps(footer, separators=(",", ":")).encode("utf-8")
+            target.write(encoded)
+            target.write(TRAILER.pack(FOOTER_MAGIC, len(encoded)))
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_path, sealed)
+        fsync_dir(self.path)
+        os.remove(active)
+        self.sequence += 1
+
+    def close(self, seal=False):
+        """Finish writing; seal=True also seals the active segment"""
+        if seal:
+            self.rotate()
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        """Read an archive written by ArchiveWriter"""
+        self.path = path
+
+    def segments(self):
+        """Get (sequence, path, footer) for sealed segments and (sequence, path, None) for the active one"""
+        found = []
+        for name in os.listdir(self.path):
+            match = SEGMENT_RE.match(name)
+            if not match:
+                continue
+            path = os.path.join(self.path, name)
+            footer = read_footer(path) if match.group(2) == "seg" else None
+            found.append((int(match.group(1)), path, footer))
+        return sorted(found, key=lambda segment: segment[0])
+
+    def read(self, start=None, end=None):
+        """Yield records created between start and end (epoch seconds, inclusive)
+
+        Sealed segments and blocks whose time range is outside the window are
+        skipped using their footers, without reading or decompressing them.
+        """
+        for _, path, footer in self.segments():
+            if footer is None:
+                with open(path, "rb") as f:
+                    yield from _filter(_parse_lines(f), start, end)
+                continue
+            if not _overlaps(footer, start, end):
+                continue
+            with open(path, "rb") as f:
+                for block in footer["blocks"]:
+                    if not _overlaps(block, start, end):
+                        continue
+                    f.seek(block["offset"])
+                    data = f.read(block["length"])
+                    if footer["compression"] == "gzip":
+                        data = gzip.decompress(data)
+                    yield from _filter(_parse_lines(data.splitlines()), start, end)
+
+    def stats(self):
+        """Get segment count, record count and time range from the footers and active segment"""
+        segments = self.segments()
+        ranges = []
+        for _, path, footer in segments:
+            if footer is None:
+                with open(path, "rb") as f:
+                    footer = _block_range(_created_at(record) for record in _parse_lines(f))
+            ranges.append(footer)
+        summary = _merge_ranges(ranges)
+        summary["segments"] = len(segments)
+        return summary
+
+
+def read_footer(path):
+    """Read the footer index of a sealed segment"""
+    with open(path, "rb") as f:
+        f.seek(-TRAILER.size, os.SEEK_END)
+        magic, length = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != FOOTER_MAGIC:
+            raise ValueError(f"{path} is not a sealed archive segment")
+        f.seek(-TRAILER.size - length, os.SEEK_END)
+        return json.loads(f.read(length))
+
+
+def _write_blocks(source, target, compression, block_bytes):
+    """Copy NDJSON lines from source into blocks in target; returns the footer"""
+    blocks = []
+    lines = []
+    size = 0
+
+    def flush():
+        data = b"".join(lines)
+        if compression == "gzip":
+            data = gzip.compress(data)
+        block = _block_range(_created_at(json.loads(line)) for line in lines)
+        block.update(offset=target.tell(), length=len(data))
+        target.write(data)
+        blocks.append(block)
+
+    for line in source:
+        if not line.strip():
+            continue
+        lines.append(line)
+        size += len(line)
+        if size >= block_bytes:
+            flush()
+            lines = []
+            size = 0
+    if lines:
+        flush()
+    footer = _merge_ranges(blocks)
+    footer["compression"] = compression
+    footer["blocks"] = blocks
+    return footer
+
+
+def _block_range(timestamps):
+    """Record count and time range of a sequence of creation times (None for unknown)"""
+    records = 0
+    first = last = None
+    for created in timestamps:
+        records += 1
+        if created is not None:
+            first = created if first is None else min(first, created)
+            last = created if last is None else max(last, created)
+    return {"records": records, "first": first, "last": last}
+
+
+def _merge_ranges(ranges):
+    """Combine the record counts and time ranges of several blocks or segments"""
+    firsts = [entry["first"] for entry in ranges if entry["first"] is not None]
+    lasts = [entry["last"] for entry in ranges if entry["last"] is not None]
+    return {
+        "records": sum(entry["records"] for entry in ranges),
+        "first": min(firsts, default=None),
+        "last": max(lasts, default=None)
+    }
+
+
+def _created_at(record):
+    """Creation time of an archived record as epoch seconds, or None"""
+    created = MessageRecord.parse_timestamp(record.get("timestamp")) if isinstance(record, dict) else None
+    return created if isinstance(created, float) else None
+
+
+def _overlaps(entry, start, end):
+    """Whether a footer or block time range may contain records in [start, end]"""
+    if entry["first"] is None:
+        # Records without timestamps can't be ruled out
+        return True
+    return (end is None or entry["first"] <= end) and (start is None or entry["last"] >= start)
+
+
+def _filter(records, start, end):
+    """Keep records created in [start, end]; records without a time only match an open window"""
+    for record in records:
+        if start is None and end is None:
+            yield record
+            continue
+        created = _created_at(record)
+        if created is not None and (start is None or created >= start) and (end is None or created <= end):
+            yield record
+
+
+def _parse_lines(lines):
+    """Parse NDJSON lines, skipping blank ones"""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _truncate_torn_line(path):
+    """Drop a partially written last line left by a crash during append"""
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the last complete line
+        position = size
+        while position > 0:
+            step = min(64 * 1024, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+
+def fsync_dir(path):
+    """Make a rename in a directory durable (not supported on every platform)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
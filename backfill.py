@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import discord
+
+from metrics import metrics
+
+
+class HistoryBackfill:
+    def __init__(self, index, page_size=100, page_delay=1.0, idle_delay=60.0):
+        """Page channel history into the message index with resumable cursors"""
+        self.index = index
+        self.page_size = page_size
+        self.page_delay = page_delay
+        self.idle_delay = idle_delay
+        self.locks = {}
+        # Channels whose offline gap has been closed since the last READY;
+        # from then on gateway events keep them current
+        self.caught_up = set()
+        # Channels the background task is done with until the next READY
+        self.finished = set()
+        self.task = None
+
+    def channel_lock(self, channel_id):
+        """Get the lock that serializes backfill work on one channel"""
+        if channel_id not in self.locks:
+            self.locks[channel_id] = asyncio.Lock()
+        return self.locks[channel_id]
+
+    async def fetch_page(self, channel, **kwargs):
+        """Fetch one page of history and add it to the index"""
+        with metrics.stage("history"):
+            page = [message async for message in channel.history(limit=self.page_size, **kwargs)]
+        # Index calls run in a worker thread so the event loop never waits on the index lock
+        await asyncio.to_thread(self.index.add_messages, page)
+        return page
+
+    async def catch_up(self, channel, cursor, delay):
+        """Fetch messages posted after the cursor's newest id (e.g. while the bot was offline)"""
+        newest_id = cursor["newest_id"] or 0
+        while True:
+            page = await self.fetch_page(channel, after=discord.Object(id=newest_id), oldest_first=True)
+            if page:
+                newest_id = max(newest_id, max(message.id for message in page))
+                cursor["newest_id"] = newest_id
+                await self.save(channel.id, cursor)
+            if len(page) < self.page_size:
+                break
+            await asyncio.sleep(delay)
+        self.caught_up.add(channel.id)
+
+    async def backfill_channel(self, channel, max_pages=None, delay=0):
+        """Walk a channel's history backwards from the saved cursor
+
+        Stops after max_pages pages (None walks to the start of the channel),
+        sleeping delay seconds between pages. Returns the channel's cursor.
+        """
+        async with self.channel_lock(channel.id):
+            cursor = await asyncio.to_thread(self.index.get_cursor, channel.id)
+            if cursor is None:
+                cursor = {"oldest_id": None, "newest_id": None, "complete": False}
+            elif channel.id not in self.caught_up and (cursor["newest_id"] is not None or cursor["complete"]):
+                await self.catch_up(channel, cursor, delay)
+
+            pages = 0
+            while not cursor["complete"] and (max_pages is None or pages < max_pages):
+                before = discord.Object(id=cursor["oldest_id"]) if cursor["oldest_id"] else None
+                page = await self.fetch_page(channel, before=before)
+                pages += 1
+                if page:
+                    ids = [message.id for message in page]
+                    cursor["oldest_id"] = min(ids)
+                    if cursor["newest_id"] is None:
+                        cursor["newest_id"] = max(ids)
+                        self.caught_up.add(channel.id)
+                if len(page) < self.page_size:
+                    cursor["complete"] = True
+                await self.save(channel.id, cursor)
+                if not cursor["complete"] and (max_pages is None or pages < max_pages):
+                    await asyncio.sleep(delay)
+            return cursor
+
+    async def ensure_indexed(self, channel, pages):
+        """Make sure a channel's recent history is indexed before answering from the index
+
+        A channel that was never backfilled gets its newest pages fetched; one
+        that already has a cursor only catches up on messages after it.
+        """
+        cursor = await asyncio.to_thread(self.index.get_cursor, channel.id)
+        return await self.backfill_channel(channel, max_pages=pages if cursor is None else 0)
+
+    async def save(self, channel_id, cursor):
+        """Persist a cursor after every page so a restart resumes from it"""
+        await asyncio.to_thread(
+            self.index.save_cursor, channel_id, cursor["oldest_id"], cursor["newest_id"], cursor["complete"], time.time()
+        )
+
+    def reset_session(self):
+        """Forget which channels are caught up (call on every READY)"""
+        self.caught_up.clear()
+        self.finished.clear()
+
+    async def run(self, bot):
+        """Backfill every readable text channel the bot can see, one page per channel per pass
+
+        Channels take turns so one huge channel doesn't hold up the rest, and
+        they are listed again on every pass so channels created after READY
+        are picked up too. Once every channel is complete the task keeps
+        checking for new channels every idle_delay seconds.
+        """
+        while True:
+            pending = False
+            for guild in list(bot.guilds):
+                for channel in list(guild.text_channels):
+                    if channel.id in self.finished or not channel.permissions_for(guild.me).read_message_history:
+                        continue
+                    try:
+                        # One page at a time so interactive commands on the same
+                        # channel only wait for the page in flight
+                        cursor = await self.backfill_channel(channel, max_pages=1, delay=self.page_delay)
+                    except discord.Forbidden:
+                        self.finished.add(channel.id)
+                        continue
+                    except discord.HTTPException as e:
+                        print(f"Backfill of #{channel.name} stopped: {e}")
+                        self.finished.add(channel.id)
+                        continue
+                    if cursor["complete"]:
+                        self.finished.add(channel.id)
+                    else:
+                        pending = True
+                    await asyncio.sleep(self.page_delay)
+            if not pending:
+                await asyncio.sleep(self.idle_delay)
+
+    def start(self, bot):
+        """Start the background backfill task if it isn't already running"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run(bot))
+        return self.task
@@ -0,0 +1,303 @@
+"""Offline benchmark and load test for the bot's slash command handlers
+
+Runs the handlers in bot.py against an in-process fake of the Discord API
+(guild, channels, members and paged message history) so performance changes
+can be measured without a live server:
+
+    python benchmark.py --members 100000 --channels 5000 --messages 1000000 \\
+        --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+from discord.utils import time_snowflake
+
+# Synthetic history starts here and has one message every MESSAGE_GAP seconds per channel
+HISTORY_START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+MESSAGE_GAP = 60
+
+interaction_ids = itertools.count()
+
+
+class FakeUser:
+    def __init__(self, user_id, guild):
+        """Guild member with the attributes the command handlers read"""
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.discriminator = "0"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.guild = guild
+        self.created_at = HISTORY_START - timedelta(days=user_id % 1000)
+        self.joined_at = HISTORY_START
+        self.premium_since = None
+        self.status = discord.Status.online
+        self.activities = ()
+        self.color = discord.Color.default()
+        self.display_avatar = SimpleNamespace(url=f"https://cdn.example/avatars/{user_id}.png")
+
+    @property
+    def roles(self):
+        return self.guild.roles[:1]
+
+    @property
+    def top_role(self):
+        return self.guild.roles[0]
+
+
+class FakeReaction:
+    def __init__(self, count):
+        """One emoji's reactions on a message"""
+        self.count = count
+
+
+class FakeMessage:
+    __slots__ = ("id", "channel", "guild", "author", "created_at", "edited_at",
+                 "content", "attachments", "embeds", "reactions")
+
+    def __init__(self, channel, index):
+        """The index-th message of a channel, derived deterministically from its position"""
+        self.channel = channel
+        self.guild = channel.guild
+        self.created_at = HISTORY_START + timedelta(seconds=index * MESSAGE_GAP)
+        self.id = time_snowflake(self.created_at) + channel.position
+        self.author = channel.guild.members[(index * 7919 + channel.position) % len(channel.guild.members)]
+        self.edited_at = None
+        self.content = f"synthetic message {index} in #{channel.name}"
+        self.attachments = [None] if index % 10 == 0 else []
+        self.embeds = [None] if index % 25 == 0 else []
+        self.reactions = [FakeReaction(index % 3)] if index % 3 else []
+
+
+class FakeCategory:
+    def __init__(self, category_id, position, guild):
+        """Channel category holding a slice of the guild's text channels"""
+        self.id = category_id
+        self.name = f"category-{position}"
+        self.position = position
+        self.guild = guild
+        self.category = None
+        self.channels = []
+
+
+class FakeTextChannel(discord.TextChannel):
+    def __init__(self, channel_id, position, guild, category, message_count, api_latency):
+        """Text channel whose history() pages through synthetic messages"""
+        self.id = channel_id
+        self.name = f"channel-{position}"
+        self.guild = guild
+        self.topic = f"Synthetic channel {position}"
+        self.nsfw = False
+        self.slowmode_delay = 0
+        self.position = position
+        self.category_id = category.id
+        self.last_message_id = None
+        self.fake_category = category
+        self.message_count = message_count
+        self.api_latency = api_latency
+
+    @property
+    def category(self):
+        return self.fake_category
+
+    def permissions_for(self, member):
+        return discord.Permissions.text()
+
+    def message_index(self, snowflake):
+        """Position of the first synthetic message created at or after a snowflake's time"""
+        created = discord.utils.snowflake_time(snowflake)
+        return max(0, -(-int((created - HISTORY_START).total_seconds()) // MESSAGE_GAP))
+
+    async def history(self, limit=100, before=None, after=None, oldest_first=None):
+        """Yield synthetic messages in pages of 100, sleeping api_latency per page like a REST call"""
+        stop = self.message_count if before is None else min(self.message_count, self.message_index(before.id))
+        if before is not None and stop < self.message_count and FakeMessage(self, stop).id < before.id:
+            stop += 1
+        start = 0 if after is None else self.message_index(after.id)
+        if after is not None and start < self.message_count and FakeMessage(self, start).id <= after.id:
+            start += 1
+        if oldest_first is None:
+            oldest_first = after is not None
+        positions = range(start, stop) if oldest_first else range(stop - 1, start - 1, -1)
+        if limit is not None:
+            positions = positions[:limit]
+        for page_start in range(0, len(positions), 100):
+            if self.api_latency:
+                await asyncio.sleep(self.api_latency)
+            for index in positions[page_start:page_start + 100]:
+                yield FakeMessage(self, index)
+
+
+class FakeGuild:
+    def __init__(self, members, channels, messages, api_latency, channels_per_category=50):
+        """Synthetic guild with members, categories and text channels"""
+        self.id = 1000
+        self.name = "Benchmark Guild"
+        self.created_at = HISTORY_START - timedelta(days=365)
+        self.premium_tier = 0
+        self.premium_subscription_count = 0
+        self.roles = [SimpleNamespace(name="@everyone"), SimpleNamespace(name="member")]
+        self.emojis = []
+        self.members = [FakeUser(100000 + i, self) for i in range(members)]
+        self.member_count = members
+        self.owner = self.members[0]
+        self.me = self.members[0]
+        self.voice_channels = []
+        self.categories = []
+        self.text_channels = []
+        per_channel = max(1, messages // max(1, channels))
+        for position in range(channels):
+            if position % channels_per_category == 0:
+                category = FakeCategory(2000000 + position, len(self.categories), self)
+                self.categories.append(category)
+            channel = FakeTextChannel(3000000 + position, position, self, category, per_channel, api_latency)
+            category.channels.append(channel)
+            self.text_channels.append(channel)
+        self.channels = [*self.categories, *self.text_channels]
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        """Initial interaction response (defer or message)"""
+        self.interaction = interaction
+
+    async def defer(self, **kwargs):
+        self.interaction.calls += 1
+
+    async def send_message(self, *args, **kwargs):
+        self.interaction.calls += 1
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        """Interaction followup webhook"""
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        self.interaction.calls += 1
+
+
+class FakeInteraction:
+    def __init__(self, guild, channel, user):
+        """Slash command invocation in a channel"""
+        self.guild = guild
+        self.channel = channel
+        self.user = user
+        self.token = f"token-{next(interaction_ids)}"
+        self.calls = 0
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def edit_original_response(self, **kwargs):
+        self.calls += 1
+
+
+def scenario(bot_module, guild, name, rng):
+    """Build a coroutine factory that runs one command handler invocation"""
+    def run():
+        channel = rng.choice(guild.text_channels)
+        user = rng.choice(guild.members)
+        interaction = FakeInteraction(guild, channel, user)
+        if name == "channel_stats":
+            return bot_module.channel_stats.callback(interaction, channel)
+        if name == "scrape_user_messages":
+            return bot_module.scrape_user_messages.callback(interaction, user, channel, 50)
+        if name == "analyze_server":
+            return bot_module.analyze_server.callback(interaction)
+        if name == "analyze_user":
+            return bot_module.analyze_user.callback(interaction, user)
+        if name == "activity":
+            return bot_module.channel_activity.callback(interaction, channel, None, 30)
+        if name == "guild_stats":
+            return bot_module.guild_stats.callback(interaction)
+        raise ValueError(f"Unknown command: {name}")
+    return run
+
+
+async def drive(factories, requests, concurrency):
+    """Run requests invocations at the given concurrency and collect their latencies"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(factory):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await factory()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(factories[i % len(factories)]) for i in range(requests)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
+
+
+def main():
+    """Parse arguments, build the synthetic guild and benchmark each command"""
+    parser = argparse.ArgumentParser(description="Benchmark the bot's command handlers against a fake Discord")
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--channels", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=100000, help="total messages across all channels")
+    parser.add_argument("--requests", type=int, default=200, help="invocations per command")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="simulated seconds per history page")
+    parser.add_argument("--commands", default="channel_stats,scrape_user_messages,analyze_server,analyze_user,activity")
+    parser.add_argument("--send-rate", type=int, default=None,
+                        help="followups per 2s per interaction (default: the bot's rate-limit pacing)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Keep the benchmark's message index away from the real one
+    index_dir = tempfile.mkdtemp(prefix="bot-benchmark-")
+    os.environ["MESSAGE_INDEX_PATH"] = os.path.join(index_dir, "message_index.db")
+    import bot as bot_module
+    if args.send_rate:
+        bot_module.send_queue.rate = args.send_rate
+
+    build_start = time.perf_counter()
+    guild = FakeGuild(args.members, args.channels, args.messages, args.api_latency)
+    print(f"Built guild: {args.members} members, {args.channels} channels, "
+          f"{args.messages} messages in {time.perf_counter() - build_start:.1f}s")
+
+    rng = random.Random(args.seed)
+
+    async def run_all():
+        print(f"{'command':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'peak RSS MB':>13}")
+        for name in args.commands.split(","):
+            factories = [scenario(bot_module, guild, name, rng)]
+            latencies, errors, elapsed = await drive(factories, args.requests, args.concurrency)
+            print(f"{name:<22}{args.requests / elapsed:>10.1f}"
+                  f"{percentile(latencies, 0.50) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}"
+                  f"{errors:>8}{peak_rss_mb():>13.1f}")
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
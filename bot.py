@@ -1,10 +1,39 @@
+import time
+
+STARTED_AT = time.monotonic()
+
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import os
 from dotenv import load_dotenv
-from datetime import datetime
-import json
+from datetime import datetime, timezone
+import asyncio
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from message_index import MessageIndex
+from backfill import HistoryBackfill
+from guild_cache import GuildSnapshotCache
+from send_queue import SendQueue
+from export import spool_ndjson_gz
+from records import MessageRecord
+from stats_cache import ChannelStatsCache
+from metrics import metrics
+from activity import WEEKDAYS, activity_histograms, epoch_to_snowflake, render_histograms
+from sharding import parse_shard_ids, shard_latencies
+from member_cache import MemberLRU, startup_report
+from startup import StartupTimeline, load_manifest, save_manifest, sync_if_changed
+from jobs import JobQueue, PRIORITY_HIGH, PRIORITY_LOW
+from text_insights import format_ranking, text_insights
+from leaderboard import GuildLeaderboards
+from hyperloglog import HyperLogLog
+from write_behind import WriteBehindBuffer
+from cold_storage import ColdStore
+from pulse import PULSE_WINDOWS, PulseTracker, format_pulse
+
+# Cold-start timeline: imports, login, READY, command sync
+timeline = StartupTimeline(STARTED_AT)
+timeline.mark("imports")
 
 # Load environment variables
 load_dotenv()
@@ -15,18 +44,316 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Lazy member mode: skip member chunking at login and don't cache members;
+# commands fetch the few members they need into a bounded LRU instead
+LAZY_MEMBERS = os.getenv("LAZY_MEMBERS", "0") == "1"
+bot_options = {}
+if LAZY_MEMBERS:
+    bot_options["chunk_guilds_at_startup"] = False
+    bot_options["member_cache_flags"] = discord.MemberCacheFlags.none()
+
+# Sharded mode: SHARD_COUNT (or SHARDED=1 for Discord's recommended count) switches
+# to AutoShardedBot; SHARD_IDS limits this process to a range (see sharding.py)
+if os.getenv("SHARD_COUNT") or os.getenv("SHARDED") == "1":
+    shard_count = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+    shard_ids = parse_shard_ids(os.getenv("SHARD_IDS")) if os.getenv("SHARD_IDS") else None
+    bot = commands.AutoShardedBot(
+        command_prefix='!', intents=intents, shard_count=shard_count, shard_ids=shard_ids, **bot_options
+    )
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, **bot_options)
+
+# Index of this worker process when launched by sharding.py
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))
+
+# Command tree hash of the last sync, so unchanged trees aren't re-synced
+COMMAND_MANIFEST_PATH = os.getenv("COMMAND_MANIFEST_PATH", ".command_manifest.json")
+
+# Startup report of the last start that cached every member, the baseline
+# for how much READY time lazy member mode saves
+STARTUP_BASELINE_PATH = os.getenv("STARTUP_BASELINE_PATH", ".startup_baseline.json")
+
+# Sync commands to this guild only (instant updates while developing)
+DEV_GUILD_ID = os.getenv("DEV_GUILD_ID")
+
+async def setup_hook():
+    """Runs after login, before connecting to the gateway"""
+    timeline.mark("login")
+
+bot.setup_hook = setup_hook
+
+close_client = bot.close
+
+async def close():
+    """Disconnect, then write the events still buffered for the index"""
+    await close_client()
+    await write_behind.close()
+
+bot.close = close
+
+# Count REST calls and interaction webhook calls (defer, followups) per command
+metrics.count_api_calls(bot.http)
+metrics.count_api_calls(discord.webhook.async_.async_context.get())
+metrics.count_followups(discord.webhook.async_.async_context.get())
+
+# Local message index, kept current from gateway events
+message_index = MessageIndex(os.getenv("MESSAGE_INDEX_PATH", "message_index.db"))
+
+# Resumable history backfill into the index
+backfill = HistoryBackfill(message_index, page_delay=float(os.getenv("BACKFILL_PAGE_DELAY", "1.0")))
+
+# Per-guild channel structure snapshots for analyze_server
+guild_snapshots = GuildSnapshotCache()
+
+# channel_stats aggregates, refreshed incrementally once their TTL expires
+# Count unique authors with HyperLogLog sketches (±3.25%) instead of exact id sets
+APPROX_DISTINCT = os.getenv("APPROX_DISTINCT", "0") == "1"
+# Messages older than COLD_STORAGE_DAYS are compacted out of the index into
+# compressed columnar segments (0 keeps everything in the index)
+COLD_STORAGE_DAYS = float(os.getenv("COLD_STORAGE_DAYS", "0"))
+cold_store = ColdStore(message_index, os.getenv("COLD_STORAGE_PATH", "cold_storage"))
+
+channel_stats_cache = ChannelStatsCache(
+    message_index, ttl=float(os.getenv("CHANNEL_STATS_TTL", "60")), approximate=APPROX_DISTINCT, cold=cold_store
+)
+
+# Gateway message, edit, delete and reaction events are written to the index
+# in batched transactions; edits and deletes refresh channel stats once written
+write_behind = WriteBehindBuffer(
+    message_index,
+    max_batch=int(os.getenv("WRITE_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("WRITE_FLUSH_INTERVAL", "1.0")),
+    max_pending=int(os.getenv("WRITE_MAX_PENDING", "10000")),
+    on_flush=channel_stats_cache.invalidate
+)
+
+# Rate-limited outbound queue for multi-part followups
+send_queue = SendQueue()
+
+# Worker pool for heavy analyses; identical in-flight requests share one job
+jobs = JobQueue(workers=int(os.getenv("JOB_WORKERS", "4")))
+
+# Members fetched on demand (only used for members the client cache lacks)
+member_cache = MemberLRU(int(os.getenv("MEMBER_CACHE_SIZE", "5000")))
+
+# Guild-wide rankings kept up to date from gateway events in fixed-size sketches
+leaderboards = GuildLeaderboards(
+    width=int(os.getenv("LEADERBOARD_WIDTH", "2048")),
+    exact_limit=int(os.getenv("LEADERBOARD_EXACT_LIMIT", "256"))
+)
+
+# Per-minute message ring buffers for /pulse, updated on every message
+pulse_tracker = PulseTracker()
+
+# Startup time and member caching summary, filled in on the first READY
+startup_stats = {}
+
+# Export cache and queue counters alongside the command metrics
+metrics.add_collector("guild_snapshot", guild_snapshots.stats)
+metrics.add_collector("channel_stats_cache", channel_stats_cache.stats)
+metrics.add_collector("send_queue", send_queue.stats)
+metrics.add_collector("member_cache", member_cache.stats)
+metrics.add_collector("jobs", jobs.stats)
+metrics.add_collector("leaderboards", leaderboards.stats)
+metrics.add_collector("pulse", pulse_tracker.stats)
+metrics.add_collector("write_behind", write_behind.stats)
+metrics.add_collector("cold_storage", cold_store.stats)
+metrics.add_collector("startup", lambda: startup_stats)
+metrics.add_collector("startup_phase", timeline.stats)
+
+def shard_health():
+    """Per-shard gateway latency of this process, exported as metrics"""
+    return {
+        f'latency_seconds{{shard="{shard_id}"}}': latency
+        for shard_id, latency in shard_latencies(bot)
+        if latency == latency  # NaN until the first heartbeat
+    }
+
+metrics.add_collector("shard", shard_health)
+
+# Worker processes for CPU-heavy text analysis, kept off the event loop
+text_pool = ProcessPoolExecutor(max_workers=int(os.getenv("TEXT_WORKERS", str(min(4, os.cpu_count() or 1)))))
+
+# Maximum number of channels /guild_stats analyzes at once
+GUILD_STATS_CONCURRENCY = int(os.getenv("GUILD_STATS_CONCURRENCY", "5"))
 
 @bot.event
 async def on_ready():
     print(f'{bot.user} has logged in!')
+    timeline.mark("ready")
+    if not startup_stats:
+        baseline = load_manifest(STARTUP_BASELINE_PATH) if LAZY_MEMBERS else None
+        startup_stats.update(startup_report(bot, STARTED_AT, time.monotonic(), baseline))
+        if not LAZY_MEMBERS and WORKER_INDEX == 0:
+            save_manifest(STARTUP_BASELINE_PATH, startup_stats)
+        print(
+            f"Ready in {startup_stats['ready_seconds']:.1f}s: "
+            f"{startup_stats['members_cached']}/{startup_stats['members_total']} members cached"
+            + (f", ~{startup_stats['estimated_bytes_saved'] / 1048576:.0f} MB saved by lazy members" if LAZY_MEMBERS else "")
+            + (f", {startup_stats['ready_seconds_saved']:.1f}s faster than the last full member cache start"
+               if "ready_seconds_saved" in startup_stats else "")
+        )
+    # Events may have been missed before this READY, so channels must catch up again
+    backfill.reset_session()
+    channel_stats_cache.clear()
+    if os.getenv("BACKFILL_ENABLED", "1") == "1":
+        backfill.start(bot)
+    metrics_port = os.getenv("METRICS_PORT", "9108")
+    if metrics_port != "0":
+        await metrics.start_server(os.getenv("METRICS_HOST", "127.0.0.1"), int(metrics_port))
+    if not shard_heartbeat.is_running():
+        shard_heartbeat.start()
+    # Workers share the index, so only the first one compacts it
+    if WORKER_INDEX == 0 and COLD_STORAGE_DAYS > 0 and not compact_cold_storage.is_running():
+        compact_cold_storage.start()
+    # Commands are global, so only the first worker process syncs them, and
+    # only once per process (on_ready also fires after reconnects)
+    if WORKER_INDEX != 0 or "sync" in timeline.marks:
+        return
     try:
-        synced = await bot.tree.sync()
-        print(f'Synced {len(synced)} command(s)')
+        guild = None
+        if DEV_GUILD_ID:
+            guild = discord.Object(id=int(DEV_GUILD_ID))
+            bot.tree.copy_global_to(guild=guild)
+        synced = await sync_if_changed(
+            bot, COMMAND_MANIFEST_PATH, guild=guild, force=os.getenv("FORCE_SYNC") == "1"
+        )
+        if synced is None:
+            print('Command tree unchanged, skipped sync')
+        else:
+            print(f'Synced {synced} command(s)' + (f' to guild {DEV_GUILD_ID}' if guild else ''))
     except Exception as e:
         print(f'Failed to sync commands: {e}')
+        return
+    timeline.mark("sync")
+    print(f'Startup timeline: {timeline.report()}')
+
+@tasks.loop(seconds=15)
+async def shard_heartbeat():
+    """Publish this process's shard health to the shared store for /shards"""
+    now = time.time()
+    for shard_id, latency in shard_latencies(bot):
+        shard = bot.get_shard(shard_id) if hasattr(bot, "get_shard") else None
+        closed = shard.is_closed() if shard else bot.is_closed()
+        await asyncio.to_thread(
+            message_index.save_shard_status,
+            shard_id, os.getpid(), "disconnected" if closed else "connected",
+            latency if latency == latency else None,
+            sum(1 for guild in bot.guilds if guild.shard_id == shard_id),
+            now
+        )
+
+async def run_compaction():
+    """Compact old messages into cold segments in a worker thread"""
+    return await asyncio.to_thread(cold_store.compact, COLD_STORAGE_DAYS * 86400)
+
+@tasks.loop(hours=1)
+async def compact_cold_storage():
+    """Move messages older than COLD_STORAGE_DAYS from the index into cold segments"""
+    job = jobs.submit(("compact_cold_storage",), "compact_cold_storage", run_compaction, PRIORITY_LOW)
+    try:
+        channels = await job.wait()
+    except Exception as e:
+        print(f"Cold storage compaction failed: {e}")
+        return
+    # Cached totals were taken before the rows moved tiers
+    for channel_id in channels:
+        channel_stats_cache.invalidate(channel_id)
+
+@bot.listen('on_shard_disconnect')
+async def record_shard_disconnect(shard_id):
+    """Mark a shard disconnected in the shared store straight away"""
+    await asyncio.to_thread(
+        message_index.save_shard_status, shard_id, os.getpid(), "disconnected", None, None, time.time()
+    )
+
+@bot.listen('on_message')
+async def index_message(message):
+    """Add new guild messages to the local index"""
+    if message.guild:
+        await write_behind.add_message(message)
+
+@bot.listen('on_message')
+async def count_message(message):
+    """Count new messages towards the author and channel leaderboards"""
+    if message.guild and not message.author.bot:
+        leaderboards.record_message(message.guild.id, message.channel.id, message.author.id)
+
+@bot.listen('on_message')
+async def track_pulse(message):
+    """Count new messages in the per-minute activity ring buffers"""
+    if message.guild and not message.author.bot:
+        pulse_tracker.record_message(message.guild.id, message.channel.id, message.author.id)
+
+@bot.listen('on_raw_reaction_add')
+async def count_reaction(payload):
+    """Count added reactions towards the most reacted-to messages"""
+    if payload.guild_id:
+        leaderboards.record_reaction(payload.guild_id, payload.channel_id, payload.message_id)
+
+@bot.listen('on_raw_reaction_add')
+async def index_reaction_add(payload):
+    """Count added reactions in the local index"""
+    if payload.guild_id:
+        await write_behind.add_reaction(payload.message_id, 1)
+
+@bot.listen('on_raw_reaction_remove')
+async def index_reaction_remove(payload):
+    """Count removed reactions in the local index"""
+    if payload.guild_id:
+        await write_behind.add_reaction(payload.message_id, -1)
+
+@bot.listen('on_raw_reaction_clear')
+async def index_reaction_clear(payload):
+    """Reset the reaction count of a message whose reactions were cleared"""
+    if payload.guild_id:
+        await write_behind.clear_reactions(payload.message_id)
+
+@bot.listen('on_raw_message_edit')
+async def index_message_edit(payload):
+    """Apply message edits to the local index"""
+    await write_behind.edit_message(payload.channel_id, payload.message_id, payload.data)
+
+@bot.listen('on_raw_message_delete')
+async def index_message_delete(payload):
+    """Remove deleted messages from the local index"""
+    await write_behind.delete_messages(payload.channel_id, [payload.message_id])
+
+@bot.listen('on_raw_bulk_message_delete')
+async def index_bulk_message_delete(payload):
+    """Remove bulk-deleted messages from the local index"""
+    await write_behind.delete_messages(payload.channel_id, payload.message_ids)
+
+@bot.listen('on_guild_channel_create')
+@bot.listen('on_guild_channel_delete')
+async def invalidate_guild_snapshot(channel):
+    """Drop the cached structure of a guild whose channels changed"""
+    guild_snapshots.invalidate(channel.guild.id)
+
+@bot.listen('on_guild_channel_update')
+async def invalidate_guild_snapshot_on_update(before, after):
+    """Drop the cached structure of a guild whose channel was edited or moved"""
+    guild_snapshots.invalidate(after.guild.id)
+
+@bot.listen('on_guild_update')
+async def invalidate_guild_snapshot_on_guild_update(before, after):
+    """Drop the cached structure of a guild whose settings changed"""
+    guild_snapshots.invalidate(after.id)
+
+@bot.listen('on_guild_remove')
+async def drop_guild_snapshot(guild):
+    """Forget the cached structure, leaderboards and pulse of a guild the bot left"""
+    guild_snapshots.invalidate(guild.id)
+    leaderboards.discard(guild.id)
+    pulse_tracker.discard(guild.id)
+
+@bot.listen('on_raw_member_remove')
+async def forget_member(payload):
+    """Drop members who left a guild from the on-demand member cache"""
+    member_cache.discard(payload.guild_id, payload.user.id)
 
 @bot.tree.command(name="analyze_server", description="Analyze the current server structure")
+@metrics.instrument("analyze_server")
 async def analyze_server(interaction: discord.Interaction):
     """Analyze the server and return its structure"""
     if not interaction.guild:
@@ -34,20 +361,18 @@ async def analyze_server(interaction: discord.Interaction):
         return
     
     guild = interaction.guild
+    snapshot = guild_snapshots.get(guild)
+    # With lazy members the owner usually isn't cached
+    owner = guild.owner or await member_cache.get(guild, guild.owner_id)
     
     # Collect server data
     server_data = {
         "server_name": guild.name,
         "server_id": str(guild.id),
-        "owner": f"{guild.owner.name}#{guild.owner.discriminator}" if guild.owner else "Unknown",
+        "owner": f"{owner.name}#{owner.discriminator}" if owner else "Unknown",
         "member_count": guild.member_count,
         "created_at": guild.created_at.isoformat(),
-        "channels": {
-            "text_channels": len(guild.text_channels),
-            "voice_channels": len(guild.voice_channels),
-            "categories": len(guild.categories),
-            "total": len(guild.channels)
-        },
+        "channels": snapshot["channels"],
         "roles": len(guild.roles),
         "emojis": len(guild.emojis),
         "boost_level": guild.premium_tier,
@@ -70,37 +395,17 @@ async def analyze_server(interaction: discord.Interaction):
     embed.add_field(name="Emojis", value=str(server_data["emojis"]), inline=True)
     embed.add_field(name="Boost Level", value=f"Level {server_data['boost_level']}", inline=True)
     
-    await interaction.response.send_message(embed=embed)
+    with metrics.stage("respond"):
+        await interaction.response.send_message(embed=embed)
     
     # Send detailed channel list
-    channel_list = "**Channel List:**\n"
-    for category in sorted(guild.categories, key=lambda x: x.position):
-        channel_list += f"\n📁 **{category.name}**\n"
-        for channel in sorted(category.channels, key=lambda x: x.position):
-            if isinstance(channel, discord.TextChannel):
-                channel_list += f"   {channel.mention} ({channel.topic or 'No topic'})\n"
-            elif isinstance(channel, discord.VoiceChannel):
-                channel_list += f"  🔊 {channel.name}\n"
-    
-    # Add uncategorized channels
-    uncategorized = [ch for ch in guild.channels if ch.category is None]
-    if uncategorized:
-        channel_list += "\n**Uncategorized:**\n"
-        for channel in uncategorized:
-            if isinstance(channel, discord.TextChannel):
-                channel_list += f"   {channel.mention}\n"
-            elif isinstance(channel, discord.VoiceChannel):
-                channel_list += f"   {channel.name}\n"
-    
-    if len(channel_list) > 2000:
-        # Split into multiple messages if too long
-        parts = [channel_list[i:i+2000] for i in range(0, len(channel_list), 2000)]
-        for part in parts:
-            await interaction.followup.send(part)
-    else:
-        await interaction.followup.send(channel_list)
+    channel_list = snapshot["channel_list"]
+    
+    # Long lists are split on line boundaries
+    await send_queue.followup(interaction, channel_list)
 
 @bot.tree.command(name="analyze_user", description="Get detailed information about a specific user")
+@metrics.instrument("analyze_user")
 async def analyze_user(interaction: discord.Interaction, user: discord.Member = None):
     """Analyze a specific user in the server"""
     if not interaction.guild:
@@ -163,7 +468,24 @@ async def analyze_user(interaction: discord.Interaction, user: discord.Member =
         activities_text = "\n".join([f"• {act['name']} ({act['type']})" for act in user_data["activities"]])
         embed.add_field(name="Activities", value=activities_text, inline=False)
     
-    await interaction.response.send_message(embed=embed)
+    with metrics.stage("respond"):
+        await interaction.response.send_message(embed=embed)
+
+async def collect_user_messages(channel, user_id, limit):
+    """Get a user's newest messages in a channel from the per-author index"""
+    cursor = await backfill.ensure_indexed(channel, pages=2)
+    messages = await asyncio.to_thread(message_index.author_messages, channel.id, user_id, limit)
+    if len(messages) < limit and not cursor["complete"]:
+        # Quiet user: page further back (the cursor keeps this work) and look again
+        await backfill.backfill_channel(channel, max_pages=10)
+        messages = await asyncio.to_thread(message_index.author_messages, channel.id, user_id, limit)
+    if len(messages) < limit:
+        # Older messages may have been compacted into cold segments
+        before_id = messages[-1]["id"] if messages else None
+        messages += await asyncio.to_thread(
+            cold_store.author_messages, channel.id, user_id, limit - len(messages), before_id
+        )
+    return [MessageRecord.from_row(message) for message in messages]
 
 @bot.tree.command(name="scrape_user_messages", description="Scrape messages from a user in a specific channel")
 @app_commands.describe(
@@ -171,6 +493,7 @@ async def analyze_user(interaction: discord.Interaction, user: discord.Member =
     channel="The channel to search in (defaults to current channel)",
     limit="Number of messages to retrieve (max 100)"
 )
+@metrics.instrument("scrape_user_messages")
 async def scrape_user_messages(
     interaction: discord.Interaction,
     user: discord.Member,
@@ -185,30 +508,23 @@ async def scrape_user_messages(
     target_channel = channel or interaction.channel
     limit = min(max(1, limit), 100)  # Clamp between 1 and 100
     
-    await interaction.response.defer(ephemeral=True)
-    
-    # Collect messages
-    messages_data = []
-    message_count = 0
+    with metrics.stage("defer"):
+        await interaction.response.defer(ephemeral=True)
     
+    # Collect messages in the job pool; identical requests share one lookup
     try:
-        async for message in target_channel.history(limit=limit * 2):  # Fetch more to filter
-            if message.author.id == user.id and not message.author.bot:
-                messages_data.append({
-                    "content": message.content,
-                    "timestamp": message.created_at.isoformat(),
-                    "message_id": str(message.id),
-                    "attachments": len(message.attachments),
-                    "embeds": len(message.embeds),
-                    "reactions": len(message.reactions)
-                })
-                message_count += 1
-                if message_count >= limit:
-                    break
+        job = jobs.submit(
+            ("scrape_user_messages", target_channel.id, user.id, limit),
+            "scrape_user_messages",
+            lambda: collect_user_messages(target_channel, user.id, limit),
+            PRIORITY_HIGH
+        )
+        messages_data = await job.wait()
     except discord.Forbidden:
         await interaction.followup.send("I don't have permission to read messages in this channel!", ephemeral=True)
         return
     except Exception as e:
+        metrics.increment("command_errors_total")
         await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
         return
     
@@ -217,9 +533,9 @@ async def scrape_user_messages(
         return
     
     # Create summary
-    total_attachments = sum(msg["attachments"] for msg in messages_data)
-    total_embeds = sum(msg["embeds"] for msg in messages_data)
-    total_reactions = sum(msg["reactions"] for msg in messages_data)
+    total_attachments = sum(msg.attachments for msg in messages_data)
+    total_embeds = sum(msg.embeds for msg in messages_data)
+    total_reactions = sum(msg.reactions for msg in messages_data)
     
     embed = discord.Embed(
         title=f"Message Scrape: {user.display_name}",
@@ -232,39 +548,63 @@ async def scrape_user_messages(
     embed.add_field(name="Total Embeds", value=str(total_embeds), inline=True)
     embed.add_field(name="Total Reactions", value=str(total_reactions), inline=True)
     
-    await interaction.followup.send(embed=embed, ephemeral=True)
+    await send_queue.followup(interaction, embed=embed, ephemeral=True)
     
     # Send message samples
     sample_text = f"**Sample Messages from {user.display_name}:**\n\n"
     for i, msg in enumerate(messages_data[:10], 1):
-        timestamp = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d %H:%M")
-        content = msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
+        timestamp = msg.created_datetime.strftime("%Y-%m-%d %H:%M")
+        content = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
         if not content:
             content = "[No text content]"
         sample_text += f"{i}. [{timestamp}] {content}\n"
-        if msg["attachments"] > 0:
-            sample_text += f"    {msg['attachments']} attachment(s)\n"
-        if msg["reactions"] > 0:
-            sample_text += f"    {msg['reactions']} reaction(s)\n"
+        if msg.attachments > 0:
+            sample_text += f"    {msg.attachments} attachment(s)\n"
+        if msg.reactions > 0:
+            sample_text += f"    {msg.reactions} reaction(s)\n"
         sample_text += "\n"
     
-    if len(sample_text) > 2000:
-        parts = [sample_text[i:i+2000] for i in range(0, len(sample_text), 2000)]
-        for part in parts:
-            await interaction.followup.send(part, ephemeral=True)
-    else:
-        await interaction.followup.send(sample_text, ephemeral=True)
+    await send_queue.followup(interaction, sample_text, ephemeral=True)
     
     # Optionally save to file
     if len(messages_data) > 10:
-        data_json = json.dumps(messages_data, indent=2)
-        file = discord.File(
-            fp=discord.utils.BytesIO(data_json.encode()),
-            filename=f"user_messages_{user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        )
-        await interaction.followup.send("Full data exported to JSON file:", file=file, ephemeral=True)
+        # Stream the export as gzip NDJSON instead of building one JSON string
+        with spool_ndjson_gz(messages_data) as export_file:
+            file = discord.File(
+                fp=export_file,
+                filename=f"user_messages_{user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
+            )
+            await send_queue.followup(interaction, "Full data exported to gzip-compressed NDJSON file:", file=file, ephemeral=True)
+
+def submit_channel_stats(channel, priority=PRIORITY_HIGH):
+    """Queue a channel statistics job, joining an identical one already in flight"""
+    return jobs.submit(("channel_stats", channel.id), "channel_stats", lambda: collect_channel_stats(channel), priority)
+
+async def collect_channel_stats(channel):
+    """Index a channel's recent history if needed and aggregate its statistics"""
+    # Make sure at least the newest 1000 messages are indexed; the background
+    # backfill covers the rest of the channel's history
+    cursor = await backfill.ensure_indexed(channel, pages=10)
+    stats = await channel_stats_cache.get(channel.id)
+    stats["complete"] = cursor["complete"]
+    return stats
+
+def format_distinct(count, approximate):
+    """Format a distinct count, marking HyperLogLog estimates with their 95% error bound"""
+    if approximate:
+        return f"≈{count} (±{2 * HyperLogLog().error:.2%})"
+    return str(count)
+
+def format_history_indexed(stats):
+    """Describe how much of a channel's history the stats cover"""
+    if stats["complete"]:
+        return "Complete"
+    if stats["oldest_message"]:
+        return f"Since {datetime.utcfromtimestamp(stats['oldest_message']).strftime('%Y-%m-%d')}"
+    return "None"
 
 @bot.tree.command(name="channel_stats", description="Get statistics about a specific channel")
+@metrics.instrument("channel_stats")
 async def channel_stats(interaction: discord.Interaction, channel: discord.TextChannel = None):
     """Get statistics about a channel"""
     if not interaction.guild:
@@ -273,24 +613,16 @@ async def channel_stats(interaction: discord.Interaction, channel: discord.TextC
     
     target_channel = channel or interaction.channel
     
-    await interaction.response.defer()
-    
-    # Collect channel data
-    message_count = 0
-    unique_authors = set()
-    total_attachments = 0
-    total_embeds = 0
+    with metrics.stage("defer"):
+        await interaction.response.defer()
     
     try:
-        async for message in target_channel.history(limit=1000):
-            message_count += 1
-            unique_authors.add(message.author.id)
-            total_attachments += len(message.attachments)
-            total_embeds += len(message.embeds)
+        stats = await submit_channel_stats(target_channel).wait()
     except discord.Forbidden:
         await interaction.followup.send("I don't have permission to read messages in this channel!")
         return
     except Exception as e:
+        metrics.increment("command_errors_total")
         await interaction.followup.send(f"An error occurred: {str(e)}")
         return
     
@@ -302,10 +634,11 @@ async def channel_stats(interaction: discord.Interaction, channel: discord.TextC
     embed.add_field(name="Channel", value=target_channel.mention, inline=True)
     embed.add_field(name="Category", value=target_channel.category.name if target_channel.category else "None", inline=True)
     embed.add_field(name="Created", value=target_channel.created_at.strftime("%Y-%m-%d"), inline=True)
-    embed.add_field(name="Messages Analyzed", value=str(message_count), inline=True)
-    embed.add_field(name="Unique Authors", value=str(len(unique_authors)), inline=True)
-    embed.add_field(name="Total Attachments", value=str(total_attachments), inline=True)
-    embed.add_field(name="Total Embeds", value=str(total_embeds), inline=True)
+    embed.add_field(name="Messages Analyzed", value=str(stats["message_count"]), inline=True)
+    embed.add_field(name="Unique Authors", value=format_distinct(stats["unique_authors"], stats["approximate"]), inline=True)
+    embed.add_field(name="Total Attachments", value=str(stats["total_attachments"]), inline=True)
+    embed.add_field(name="Total Embeds", value=str(stats["total_embeds"]), inline=True)
+    embed.add_field(name="History Indexed", value=format_history_indexed(stats), inline=True)
     embed.add_field(name="NSFW", value="Yes" if target_channel.nsfw else "No", inline=True)
     embed.add_field(name="Slowmode", value=f"{target_channel.slowmode_delay}s" if target_channel.slowmode_delay else "None", inline=True)
     
@@ -314,6 +647,467 @@ async def channel_stats(interaction: discord.Interaction, channel: discord.TextC
     
     await interaction.followup.send(embed=embed)
 
+@bot.tree.command(name="guild_stats", description="Get statistics about every text channel in the server")
+@metrics.instrument("guild_stats")
+async def guild_stats(interaction: discord.Interaction):
+    """Run channel statistics over all text channels concurrently and merge them"""
+    if not interaction.guild:
+        await interaction.response.send_message("This command can only be used in a server!", ephemeral=True)
+        return
+    
+    guild = interaction.guild
+    channels = [
+        channel for channel in guild.text_channels
+        if channel.permissions_for(guild.me).read_message_history
+    ]
+    
+    with metrics.stage("defer"):
+        await interaction.response.defer()
+    
+    semaphore = asyncio.Semaphore(GUILD_STATS_CONCURRENCY)
+    results = {}
+    failed = []
+    progress = {"done": 0, "reported_at": time.monotonic()}
+    
+    async def analyze(channel):
+        async with semaphore:
+            try:
+                # Low priority so interactive requests overtake the sweep
+                results[channel.id] = await submit_channel_stats(channel, PRIORITY_LOW).wait()
+            except Exception as e:
+                # One failing channel (API error, busy index) shouldn't sink the sweep
+                if not isinstance(e, discord.HTTPException):
+                    print(f"Stats for #{channel.name} failed: {e}")
+                failed.append(channel)
+        progress["done"] += 1
+        # Report partial progress at most every few seconds
+        if time.monotonic() - progress["reported_at"] >= 3 and progress["done"] < len(channels):
+            progress["reported_at"] = time.monotonic()
+            try:
+                await interaction.edit_original_response(
+                    content=f"Analyzed {progress['done']}/{len(channels)} channels..."
+                )
+            except discord.HTTPException:
+                pass
+    
+    await asyncio.gather(*(analyze(channel) for channel in channels))
+    
+    # Merge per-channel results into guild totals
+    total_messages = sum(stats["message_count"] for stats in results.values())
+    total_attachments = sum(stats["total_attachments"] for stats in results.values())
+    total_embeds = sum(stats["total_embeds"] for stats in results.values())
+    if APPROX_DISTINCT:
+        # Merge the cached per-channel sketches rather than rescanning history
+        unique_authors = HyperLogLog.merged(stats["authors"] for stats in results.values()).count()
+    else:
+        unique_authors = len(set().union(*(stats["authors"] for stats in results.values())))
+    complete = sum(1 for stats in results.values() if stats["complete"])
+    busiest = sorted(results.items(), key=lambda item: item[1]["message_count"], reverse=True)[:5]
+    
+    embed = discord.Embed(
+        title=f"Server Statistics: {guild.name}",
+        color=discord.Color.purple(),
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="Channels Analyzed", value=f"{len(results)}/{len(guild.text_channels)}", inline=True)
+    embed.add_field(name="Messages Analyzed", value=str(total_messages), inline=True)
+    embed.add_field(name="Unique Authors", value=format_distinct(unique_authors, APPROX_DISTINCT), inline=True)
+    embed.add_field(name="Total Attachments", value=str(total_attachments), inline=True)
+    embed.add_field(name="Total Embeds", value=str(total_embeds), inline=True)
+    embed.add_field(name="Fully Indexed Channels", value=str(complete), inline=True)
+    if busiest:
+        busiest_text = "\n".join(
+            f"<#{channel_id}>: {stats['message_count']} messages" for channel_id, stats in busiest
+        )
+        embed.add_field(name="Busiest Channels", value=busiest_text, inline=False)
+    if failed:
+        embed.add_field(name="Failed", value=", ".join(channel.mention for channel in failed)[:1024], inline=False)
+    
+    await interaction.edit_original_response(content=None, embed=embed)
+
+@bot.tree.command(name="activity", description="Show when a channel or user is most active")
+@app_commands.describe(
+    channel="The channel to analyze (defaults to current channel, or the whole server when a user is given)",
+    user="Only count messages from this user",
+    days="Number of days to cover (max 90)"
+)
+@metrics.instrument("activity")
+async def channel_activity(
+    interaction: discord.Interaction,
+    channel: discord.TextChannel = None,
+    user: discord.Member = None,
+    days: int = 30
+):
+    """Show message activity per hour of day, weekday and day"""
+    if not interaction.guild:
+        await interaction.response.send_message("This command can only be used in a server!", ephemeral=True)
+        return
+    
+    days = min(max(1, days), 90)  # Clamp between 1 and 90
+    target_channel = channel or (None if user else interaction.channel)
+    
+    # Only count messages in channels the caller can read history in
+    channels = [target_channel] if target_channel else interaction.guild.text_channels
+    channel_ids = [
+        ch.id for ch in channels
+        if ch.permissions_for(interaction.user).read_message_history
+    ]
+    if not channel_ids:
+        with metrics.stage("respond"):
+            await interaction.response.send_message("You can't read any of the channels to analyze!", ephemeral=True)
+        return
+    
+    with metrics.stage("defer"):
+        await interaction.response.defer()
+    
+    if target_channel:
+        try:
+            await backfill.ensure_indexed(target_channel, pages=10)
+        except discord.Forbidden:
+            await interaction.followup.send("I don't have permission to read messages in this channel!")
+            return
+        except Exception as e:
+            metrics.increment("command_errors_total")
+            await interaction.followup.send(f"An error occurred: {str(e)}")
+            return
+    
+    end = time.time()
+    start = end - days * 86400
+    
+    def compute():
+        filters = {
+            "guild_id": interaction.guild.id,
+            "channel_ids": channel_ids,
+            "author_id": user.id if user else None,
+            "after_id": epoch_to_snowflake(start)
+        }
+        # Long ranges reach back into compacted cold segments
+        ids = np.concatenate((
+            np.asarray(message_index.message_ids(**filters), dtype=np.uint64),
+            cold_store.message_ids(**filters)
+        ))
+        return activity_histograms(ids, start, end)
+    
+    # Bucket the timestamps off the event loop
+    histograms = await asyncio.to_thread(compute)
+    
+    scope = target_channel.mention if target_channel else "all channels you can read"
+    if user:
+        scope = f"{user.mention} in {scope}"
+    embed = discord.Embed(
+        title="Activity",
+        description=f"{scope}, last {days} day(s)",
+        color=discord.Color.orange(),
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="Messages", value=str(histograms["total"]), inline=True)
+    if histograms["total"]:
+        busiest_hour = int(histograms["hour"].argmax())
+        busiest_weekday = int(histograms["weekday"].argmax())
+        embed.add_field(name="Busiest Hour (UTC)", value=f"{busiest_hour:02d}:00", inline=True)
+        embed.add_field(name="Busiest Weekday", value=WEEKDAYS[busiest_weekday], inline=True)
+    
+    await interaction.followup.send(embed=embed)
+    if histograms["total"]:
+        await send_queue.followup(interaction, render_histograms(histograms))
+
+async def collect_text_insights(channel_ids, user_id, limit):
+    """Load indexed message text and count words, bigrams and emoji in the process pool"""
+    contents = await asyncio.to_thread(
+        message_index.message_contents, channel_ids, author_id=user_id, limit=limit
+    )
+    if len(contents) < limit:
+        # Older messages may have been compacted into cold segments
+        contents += await asyncio.to_thread(
+            cold_store.message_contents, channel_ids, user_id, limit - len(contents)
+        )
+    return await text_insights(text_pool, contents)
+
+@bot.tree.command(name="text_insights", description="Show top words, phrases and emoji for a channel or user")
+@app_commands.describe(
+    channel="The channel to analyze (defaults to current channel, or all channels with a user)",
+    user="Only analyze messages from this user",
+    limit="Number of newest messages to analyze (max 50000)"
+)
+@metrics.instrument("text_insights")
+async def text_insights_command(
+    interaction: discord.Interaction,
+    channel: discord.TextChannel = None,
+    user: discord.Member = None,
+    limit: int = 5000
+):
+    """Show top words, bigrams, emoji and average message length"""
+    if not interaction.guild:
+        await interaction.response.send_message("This command can only be used in a server!", ephemeral=True)
+        return
+    
+    limit = min(max(1, limit), 50000)  # Clamp between 1 and 50000
+    target_channel = channel or (None if user else interaction.channel)
+    
+    # Only analyze channels the caller can read history in
+    channels = [target_channel] if target_channel else interaction.guild.text_channels
+    channel_ids = [
+        ch.id for ch in channels
+        if ch.permissions_for(interaction.user).read_message_history
+    ]
+    if not channel_ids:
+        with metrics.stage("respond"):
+            await interaction.response.send_message("You can't read any of the channels to analyze!", ephemeral=True)
+        return
+    
+    with metrics.stage("defer"):
+        await interaction.response.defer()
+    
+    if target_channel:
+        try:
+            await backfill.ensure_indexed(target_channel, pages=10)
+        except discord.Forbidden:
+            await interaction.followup.send("I don't have permission to read messages in this channel!")
+            return
+        except Exception as e:
+            metrics.increment("command_errors_total")
+            await interaction.followup.send(f"An error occurred: {str(e)}")
+            return
+    
+    user_id = user.id if user else None
+    try:
+        job = jobs.submit(
+            ("text_insights", tuple(channel_ids), user_id, limit),
+            "text_insights",
+            lambda: collect_text_insights(channel_ids, user_id, limit),
+            PRIORITY_HIGH
+        )
+        with metrics.stage("analyze"):
+            insights = await job.wait()
+    except Exception as e:
+        metrics.increment("command_errors_total")
+        await interaction.followup.send(f"An error occurred: {str(e)}")
+        return
+    
+    scope = target_channel.mention if target_channel else "all channels you can read"
+    if user:
+        scope = f"{user.mention} in {scope}"
+    embed = discord.Embed(
+        title="Text Insights",
+        description=f"{scope}, newest {limit} message(s)",
+        color=discord.Color.dark_teal(),
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="Messages", value=str(insights["messages"]), inline=True)
+    embed.add_field(name="Average Length", value=f"{insights['average_length']:.1f} chars", inline=True)
+    embed.add_field(name="Top Words", value=format_ranking(insights["words"])[:1024], inline=False)
+    embed.add_field(name="Top Phrases", value=format_ranking(insights["bigrams"])[:1024], inline=False)
+    embed.add_field(name="Top Emoji", value=format_ranking(insights["emoji"])[:1024], inline=False)
+    await interaction.followup.send(embed=embed)
+
+def parse_date(text):
+    """Parse a YYYY-MM-DD date as UTC epoch seconds"""
+    return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+@bot.tree.command(name="search_messages", description="Search indexed messages by keyword or phrase")
+@app_commands.describe(
+    query='Keywords and "quoted phrases" to search for; end a word with * for a prefix match',
+    channel="Only search this channel",
+    user="Only search messages from this user",
+    after="Only messages on or after this date (YYYY-MM-DD)",
+    before="Only messages before this date (YYYY-MM-DD)"
+)
+@metrics.instrument("search_messages")
+async def search_messages(
+    interaction: discord.Interaction,
+    query: str,
+    channel: discord.TextChannel = None,
+    user: discord.Member = None,
+    after: str = None,
+    before: str = None
+):
+    """Search the message index with FTS5, best matches first"""
+    if not interaction.guild:
+        await interaction.response.send_message("This command can only be used in a server!", ephemeral=True)
+        return
+    
+    try:
+        after_ts = parse_date(after) if after else None
+        before_ts = parse_date(before) if before else None
+    except ValueError:
+        with metrics.stage("respond"):
+            await interaction.response.send_message("Dates must look like 2024-01-31.", ephemeral=True)
+        return
+    
+    # Only search channels the caller can read history in
+    channels = [channel] if channel else interaction.guild.text_channels
+    channel_ids = [
+        ch.id for ch in channels
+        if ch.permissions_for(interaction.user).read_message_history
+    ]
+    if not channel_ids:
+        with metrics.stage("respond"):
+            await interaction.response.send_message("You can't read any of the channels to search!", ephemeral=True)
+        return
+    
+    with metrics.stage("defer"):
+        await interaction.response.defer(ephemeral=True)
+    
+    start = time.perf_counter()
+    with metrics.stage("search"):
+        try:
+            filters = {"author_id": user.id if user else None, "after": after_ts, "before": before_ts}
+            results = await asyncio.to_thread(message_index.search, query, channel_ids, **filters)
+            # Compacted messages are searched separately; merge by bm25 rank
+            results += await asyncio.to_thread(cold_store.search, query, channel_ids, **filters)
+            results = sorted(results, key=lambda row: row["rank"])[:10]
+        except Exception as e:
+            metrics.increment("command_errors_total")
+            await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
+            return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    lines = []
+    for row in results:
+        link = f"https://discord.com/channels/{interaction.guild.id}/{row['channel_id']}/{row['id']}"
+        created = datetime.fromtimestamp(row["created_at"], timezone.utc).strftime("%Y-%m-%d")
+        snippet = row["snippet"].replace("\n", " ")
+        lines.append(f"[{created}]({link}) <#{row['channel_id']}> <@{row['author_id']}>: {snippet}")
+    
+    embed = discord.Embed(
+        title=f"Search: {query}"[:256],
+        description="\n".join(lines)[:4096] if lines else "No indexed messages matched.",
+        color=discord.Color.teal(),
+        timestamp=datetime.utcnow()
+    )
+    embed.set_footer(text=f"{len(results)} result(s) in {elapsed_ms:.0f} ms")
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="leaderboard", description="Rank the most active authors, most reacted-to messages or busiest channels")
+@app_commands.describe(board="What to rank")
+@app_commands.choices(board=[
+    app_commands.Choice(name="Most active authors", value="authors"),
+    app_commands.Choice(name="Most reacted-to messages", value="messages"),
+    app_commands.Choice(name="Busiest channels", value="channels")
+])
+@metrics.instrument("leaderboard")
+async def leaderboard(interaction: discord.Interaction, board: app_commands.Choice[str]):
+    """Show a guild-wide leaderboard maintained from gateway events"""
+    if not interaction.guild:
+        await interaction.response.send_message("This command can only be used in a server!", ephemeral=True)
+        return
+    
+    boards = leaderboards.boards(interaction.guild.id)
+    approximate = boards[board.value].sketch is not None
+    lines = []
+    for rank, (key, count) in enumerate(boards[board.value].items(limit=10), 1):
+        if board.value == "authors":
+            label = f"<@{key}>"
+        elif board.value == "channels":
+            label = f"<#{key}>"
+        else:
+            channel_id, message_id = key
+            label = f"[message](https://discord.com/channels/{interaction.guild.id}/{channel_id}/{message_id}) in <#{channel_id}>"
+        unit = "reaction(s)" if board.value == "messages" else "message(s)"
+        lines.append(f"{rank}. {label} {'≈ ' if approximate else ''}{count} {unit}")
+    
+    embed = discord.Embed(
+        title=f"Leaderboard: {board.name}",
+        description="\n".join(lines) if lines else "Nothing counted yet.",
+        color=discord.Color.gold(),
+        timestamp=datetime.utcnow()
+    )
+    embed.set_footer(text=f"Since {datetime.utcfromtimestamp(boards['since']).strftime('%Y-%m-%d %H:%M')} UTC" + (" · counts are estimates" if approximate else ""))
+    with metrics.stage("respond"):
+        await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="pulse", description="Show live messages per minute and active authors per channel")
+@app_commands.describe(channel="Only show this channel (defaults to the busiest channels)")
+@metrics.instrument("pulse")
+async def pulse(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    """Show rolling 5, 15 and 60 minute activity from the in-memory ring buffers"""
+    if not interaction.guild:
+        await interaction.response.send_message("This command can only be used in a server!", ephemeral=True)
+        return
+    
+    # Only show activity in channels the caller can see
+    if channel:
+        if not channel.permissions_for(interaction.user).read_messages:
+            with metrics.stage("respond"):
+                await interaction.response.send_message("You can't read that channel!", ephemeral=True)
+            return
+        windows = pulse_tracker.channel_pulse(interaction.guild.id, channel.id)
+        results = [(channel.id, windows)] if windows else []
+    else:
+        results = []
+        for channel_id, windows in pulse_tracker.guild_pulse(interaction.guild.id):
+            target = interaction.guild.get_channel(channel_id)
+            if target and target.permissions_for(interaction.user).read_messages:
+                results.append((channel_id, windows))
+        results = results[:10]
+    
+    embed = discord.Embed(
+        title="Pulse",
+        description=f"Messages per minute and active authors over the last {', '.join(map(str, PULSE_WINDOWS[:-1]))} and {PULSE_WINDOWS[-1]} minutes",
+        color=discord.Color.red(),
+        timestamp=datetime.utcnow()
+    )
+    for channel_id, windows in results:
+        target = interaction.guild.get_channel(channel_id)
+        name = f"#{target.name}" if target else str(channel_id)
+        embed.add_field(name=name, value=format_pulse(windows), inline=False)
+    if not results:
+        embed.add_field(name="Quiet", value="No messages in the last hour.", inline=False)
+    embed.set_footer(text="Counts cover messages seen since the bot connected")
+    with metrics.stage("respond"):
+        await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="jobs", description="Show queued, running and recent background jobs")
+@metrics.instrument("jobs")
+async def list_jobs(interaction: discord.Interaction):
+    """Show the status of the background job queue"""
+    now = time.time()
+    stats = jobs.stats()
+    embed = discord.Embed(
+        title="Background Jobs",
+        description=(
+            f"{stats['running']} running · {stats['queued']} queued · "
+            f"{stats['coalesced']} of {stats['submitted']} requests coalesced"
+        ),
+        color=discord.Color.dark_grey(),
+        timestamp=datetime.utcnow()
+    )
+    active = [
+        f"#{job.id} {job.name} · {job.status} · {now - job.created_at:.0f}s · {job.waiters} waiting"
+        for job in jobs.active_jobs()[:15]
+    ]
+    embed.add_field(name="Active", value="\n".join(active) if active else "None", inline=False)
+    recent = [
+        f"#{job.id} {job.name} · {job.status} in {job.finished_at - job.started_at:.1f}s"
+        + (f" ({job.error[:80]})" if job.error else "")
+        for job in reversed(jobs.recent)
+    ][:10]
+    embed.add_field(name="Recent", value="\n".join(recent)[:1024] if recent else "None", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="shards", description="Show the health and latency of every shard")
+@metrics.instrument("shards")
+async def shards(interaction: discord.Interaction):
+    """Show per-shard health for all bot processes"""
+    statuses = await asyncio.to_thread(message_index.shard_statuses)
+    embed = discord.Embed(
+        title="Shard Health",
+        color=discord.Color.teal(),
+        timestamp=datetime.utcnow()
+    )
+    if interaction.guild:
+        embed.description = f"This server is on shard {interaction.guild.shard_id}"
+    now = time.time()
+    lines = []
+    for status in statuses:
+        latency = f"{status['latency'] * 1000:.0f} ms" if status["latency"] is not None else "n/a"
+        # Shards whose process stopped reporting are stale
+        state = status["state"] if now - status["updated_at"] < 60 else "stale"
+        guilds = status["guild_count"] if status["guild_count"] is not None else "?"
+        lines.append(f"`{status['shard_id']:>3}` {state} · {latency} · {guilds} guilds · pid {status['pid']}")
+    embed.add_field(name="Shards", value="\n".join(lines)[:1024] if lines else "No shard reports yet", inline=False)
+    await interaction.response.send_message(embed=embed)
+
 # Run the bot
 if __name__ == "__main__":
     token = os.getenv("DISCORD_BOT_TOKEN")
@@ -0,0 +1,453 @@
+import json
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+from activity import DISCORD_EPOCH_MS, epoch_to_snowflake
+from archive import fsync_dir
+from hyperloglog import HyperLogLog
+from message_index import query_terms
+
+# Cold segment files end with the footer length and this marker
+SEGMENT_MAGIC = b"DSCOLD01"
+TRAILER = struct.Struct("<8sQ")
+# Most messages written to one segment; bigger channel-months get several
+SEGMENT_ROWS = 100000
+# Messages moved out of the index per transaction, and the pause between
+# transactions that lets other index users take the lock
+RETIRE_CHUNK = 2000
+RETIRE_PAUSE = 0.01
+
+# Fixed-width columns and their on-disk dtypes
+COLUMNS = {
+    "id": "<u8",
+    "author_id": "<u8",
+    "author_bot": "u1",
+    "created_at": "<f8",
+    "edited_at": "<f8",
+    "attachments": "<u4",
+    "embeds": "<u4",
+    "reactions": "<u4"
+}
+
+
+def month_bounds(message_id):
+    """Get the month ("YYYY-MM") of a snowflake and the snowflake range of that month"""
+    created = datetime.fromtimestamp(((message_id >> 22) + DISCORD_EPOCH_MS) / 1000, timezone.utc)
+    start = created.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start.strftime("%Y-%m"), epoch_to_snowflake(start.timestamp()), epoch_to_snowflake(end.timestamp())
+
+
+def snippet(content, terms, tokens=16):
+    """Highlight search terms in a window of about tokens words, like FTS5's snippet()"""
+    def matches(word):
+        return any(
+            part.startswith(term) if prefix else part == term
+            for part in re.findall(r"\w+", word.lower())
+            for term, prefix in terms
+        )
+    words = content.split()
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, min(first - tokens // 4, len(words) - tokens))
+    window = " ".join(f"**{word}**" if matches(word) else word for word in words[start:start + tokens])
+    return ("…" if start else "") + window + ("…" if start + tokens < len(words) else "")
+
+
+def write_segment(path, rows, level=6):
+    """Write index rows (dicts, oldest first) as a compressed columnar segment file
+
+    Each column is compressed separately so a scan only decompresses the
+    columns it needs. Content is stored as one UTF-8 blob plus offsets. The
+    file is written under a temporary name, fsynced and renamed into place.
+    Returns the footer.
+    """
+    arrays = {
+        name: np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=dtype)
+        for name, dtype in COLUMNS.items()
+    }
+    encoded = [row["content"].encode("utf-8") for row in rows]
+    arrays["content_offsets"] = np.concatenate(([0], np.cumsum([len(text) for text in encoded]))).astype("<u8")
+    # Distinct authors let author queries skip the segment without scanning it
+    arrays["authors"] = np.unique(arrays["author_id"])
+
+    footer = {
+        "message_count": len(rows),
+        "min_id": int(arrays["id"][0]),
+        "max_id": int(arrays["id"][-1]),
+        "columns": {}
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        blobs = [(name, array.tobytes(), array.dtype.str) for name, array in arrays.items()]
+        blobs.append(("content", b"".join(encoded), "bytes"))
+        for name, data, dtype in blobs:
+            compressed = zlib.compress(data, level)
+            footer["columns"][name] = {"offset": f.tell(), "length": len(compressed), "dtype": dtype}
+            f.write(compressed)
+        encoded_footer = json.dumps(footer, separators=(",", ":")).encode("utf-8")
+        f.write(encoded_footer)
+        f.write(TRAILER.pack(SEGMENT_MAGIC, len(encoded_footer)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    fsync_dir(os.path.dirname(path))
+    footer["bytes"] = os.path.getsize(path)
+    return footer
+
+
+class ColdSegment:
+    def __init__(self, path):
+        """Memory-map a cold segment file and read its footer"""
+        self.path = path
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = TRAILER.unpack_from(self.mm, len(self.mm) - TRAILER.size)
+        if magic != SEGMENT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a cold segment")
+        end = len(self.mm) - TRAILER.size
+        self.footer = json.loads(self.mm[end - length:end])
+
+    def raw(self, name):
+        """Decompress one column straight from the mapped file"""
+        info = self.footer["columns"][name]
+        view = memoryview(self.mm)[info["offset"]:info["offset"] + info["length"]]
+        try:
+            return zlib.decompress(view)
+        finally:
+            view.release()
+
+    def column(self, name):
+        """Get a fixed-width column as a numpy array"""
+        return np.frombuffer(self.raw(name), dtype=self.footer["columns"][name]["dtype"])
+
+    def has_author(self, author_id):
+        """Whether any message in the segment is by author_id"""
+        authors = self.column("authors")
+        position = np.searchsorted(authors, np.uint64(author_id))
+        return position < len(authors) and authors[position] == author_id
+
+    def rows(self, indices):
+        """Rebuild index-style row dicts for the given row positions"""
+        columns = {name: self.column(name) for name in COLUMNS}
+        offsets = self.column("content_offsets")
+        content = self.raw("content")
+        rows = []
+        for i in indices:
+            row = {name: columns[name][i].item() for name in COLUMNS}
+            if row["edited_at"] != row["edited_at"]:
+                row["edited_at"] = None
+            row["content"] = content[offsets[i]:offsets[i + 1]].decode("utf-8")
+            rows.append(row)
+        return rows
+
+    def close(self):
+        """Unmap and close the file"""
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColdStore:
+    def __init__(self, index, root="cold_storage"):
+        """Compacts old messages out of the index into read-only columnar segment files
+
+        Segments live under root/<guild_id>/<channel_id>/<YYYY-MM>-<first id>.cold
+        and are catalogued in the index database, so queries only open the
+        segments whose channel and id range can match.
+        """
+        self.index = index
+        self.root = root
+        self.runs = 0
+        self.segments_written = 0
+        self.messages_compacted = 0
+        self.bytes_written = 0
+        self.last_run_seconds = 0.0
+
+    def compact(self, older_than, segment_rows=SEGMENT_ROWS):
+        """Move messages older than older_than seconds into cold segments (blocking)
+
+        Messages are grouped per channel and month and written to a segment,
+        which is catalogued as pending; its messages then leave the index in
+        small transactions (see retire). Segments left pending by an
+        interrupted run are finished first. Returns the ids of the channels
+        that were compacted.
+        """
+        start = time.perf_counter()
+        cutoff_id = epoch_to_snowflake(time.time() - older_than)
+        channels = set()
+        if self.index.rebuild_cold_search:
+            self.reindex_search()
+        for segment in self.index.cold_segments(pending=True):
+            with ColdSegment(segment["path"]) as cold:
+                message_ids = cold.column("id").tolist()
+            self.retire(segment["path"], message_ids)
+            channels.add(segment["channel_id"])
+        for channel_id, guild_id, oldest_id, _ in self.index.cold_candidates(cutoff_id):
+            position = oldest_id
+            while position < cutoff_id:
+                month, _, month_end = month_bounds(position)
+                end = min(month_end, cutoff_id)
+                rows = self.index.channel_rows(channel_id, position, end, segment_rows)
+                if not rows:
+                    position = end
+                    continue
+                directory = os.path.join(self.root, str(guild_id), str(channel_id))
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{month}-{rows[0]['id']}.cold")
+                footer = write_segment(path, rows)
+                message_ids = [row["id"] for row in rows]
+                self.index.catalog_cold_segment({
+                    "path": path,
+                    "guild_id": guild_id,
+                    "channel_id": channel_id,
+                    "month": month,
+                    "message_count": len(rows),
+                    "min_id": footer["min_id"],
+                    "max_id": footer["max_id"],
+                    "oldest_message": rows[0]["created_at"],
+                    "newest_message": rows[-1]["created_at"],
+                    "total_attachments": sum(row["attachments"] for row in rows),
+                    "total_embeds": sum(row["embeds"] for row in rows),
+                    "created_at": time.time()
+                }, message_ids)
+                self.retire(path, message_ids)
+                channels.add(channel_id)
+                self.segments_written += 1
+                self.messages_compacted += len(rows)
+                self.bytes_written += footer["bytes"]
+                position = rows[-1]["id"] + 1 if len(rows) == segment_rows else end
+        if channels:
+            # Retiring leaves delete markers in the hot full-text index; merge
+            # them away in slices so it shrinks back without a long lock
+            for table in ("messages_fts", "cold_fts"):
+                while self.index.merge_search_index(table):
+                    time.sleep(RETIRE_PAUSE)
+        self.runs += 1
+        self.last_run_seconds = time.perf_counter() - start
+        return channels
+
+    def reindex_search(self):
+        """Fill a new cold_fts table from the catalogued segments
+
+        Runs when the table was just created, e.g. after the switch to a
+        contentless table. Rows a pending segment still has in the index are
+        left for retire to add.
+        """
+        for segment in self.index.cold_segments():
+            with ColdSegment(segment["path"]) as cold:
+                ids = cold.column("id")
+                authors = cold.column("author_id")
+                offsets = cold.column("content_offsets")
+                content = cold.raw("content")
+                positions = np.flatnonzero((offsets[1:] > offsets[:-1]) & self.live(segment, ids))
+            for chunk in range(0, len(positions), RETIRE_CHUNK):
+                self.index.add_cold_search([
+                    (int(ids[i]), content[offsets[i]:offsets[i + 1]].decode("utf-8"), segment["channel_id"], int(authors[i]))
+                    for i in positions[chunk:chunk + RETIRE_CHUNK]
+                ])
+                time.sleep(RETIRE_PAUSE)
+        self.index.rebuild_cold_search = False
+
+    def retire(self, path, message_ids):
+        """Move a pending segment's messages out of the index in chunks, then mark it complete
+
+        The index lock is released between chunks, so gateway writes and
+        commands wait for at most one chunk rather than the whole segment.
+        """
+        for start in range(0, len(message_ids), RETIRE_CHUNK):
+            self.index.retire_to_cold(message_ids[start:start + RETIRE_CHUNK])
+            time.sleep(RETIRE_PAUSE)
+        self.index.finish_cold_segment(path)
+
+    def message_ids(self, guild_id=None, channel_id=None, author_id=None, after_id=None, before_id=None,
+                    channel_ids=None):
+        """Get the ids of cold messages matching the filters as a numpy array"""
+        channel_ids = set(channel_ids) if channel_ids is not None else None
+        found = []
+        for segment in self.index.cold_segments(guild_id, channel_id, after_id, before_id):
+            if channel_ids is not None and segment["channel_id"] not in channel_ids:
+                continue
+            with ColdSegment(segment["path"]) as cold:
+                if author_id is not None and not cold.has_author(author_id):
+                    continue
+                ids = cold.column("id")
+                mask = self.live(segment, ids)
+                if author_id is not None:
+                    mask &= cold.column("author_id") == np.uint64(author_id)
+                if after_id is not None:
+                    mask &= ids > np.uint64(after_id)
+                if before_id is not None:
+                    mask &= ids < np.uint64(before_id)
+                found.append(ids[mask])
+        return np.concatenate(found) if found else np.array([], dtype=np.uint64)
+
+    def search(self, query, channel_ids, author_id=None, after=None, before=None, limit=10):
+        """Full-text search over cold messages, with results shaped like MessageIndex.search
+
+        cold_fts only yields matching ids and ranks; the rows and snippets
+        come from the segments. after/before are epoch seconds.
+        """
+        hits = self.index.cold_search(
+            query,
+            channel_ids,
+            author_id,
+            epoch_to_snowflake(after) if after is not None else None,
+            epoch_to_snowflake(before) if before is not None else None,
+            limit
+        )
+        channel_ids = set(channel_ids)
+        terms = query_terms(query)
+        results = []
+        for message_id, rank in hits:
+            for segment in self.index.cold_segments(after_id=message_id - 1, before_id=message_id + 1):
+                if segment["channel_id"] not in channel_ids:
+                    continue
+                with ColdSegment(segment["path"]) as cold:
+                    ids = cold.column("id")
+                    position = int(np.searchsorted(ids, np.uint64(message_id)))
+                    if position == len(ids) or ids[position] != message_id:
+                        continue
+                    row = cold.rows([position])[0]
+                row["guild_id"] = segment["guild_id"]
+                row["channel_id"] = segment["channel_id"]
+                row["snippet"] = snippet(row["content"], terms)
+                row["rank"] = rank
+                results.append(row)
+                break
+        return results
+
+    def author_messages(self, channel_id, author_id, limit, before_id=None):
+        """Get an author's newest non-bot cold messages in a channel as row dicts, newest first"""
+        rows = []
+        segments = self.index.cold_segments(channel_id=channel_id, before_id=before_id)
+        for segment in reversed(segments):
+            if len(rows) >= limit:
+                break
+            with ColdSegment(segment["path"]) as cold:
+                if not cold.has_author(author_id):
+                    continue
+                ids = cold.column("id")
+                mask = (cold.column("author_id") == np.uint64(author_id)) & (cold.column("author_bot") == 0)
+                mask &= self.live(segment, ids)
+                if before_id is not None:
+                    mask &= ids < np.uint64(before_id)
+                positions = np.flatnonzero(mask)[::-1][:limit - len(rows)]
+                for row in cold.rows(positions):
+                    row["guild_id"] = segment["guild_id"]
+                    row["channel_id"] = channel_id
+                    rows.append(row)
+        return rows
+
+    def message_contents(self, channel_ids, author_id=None, limit=5000):
+        """Get the text of the newest non-bot cold messages in the given channels, newest first"""
+        segments = [segment for channel_id in channel_ids for segment in self.index.cold_segments(channel_id=channel_id)]
+        found = []
+        for segment in sorted(segments, key=lambda segment: segment["max_id"], reverse=True):
+            if len(found) >= limit and segment["max_id"] < found[-1][0]:
+                # Every remaining segment is older than what was already found
+                break
+            with ColdSegment(segment["path"]) as cold:
+                if author_id is not None and not cold.has_author(author_id):
+                    continue
+                ids = cold.column("id")
+                offsets = cold.column("content_offsets")
+                mask = (cold.column("author_bot") == 0) & (offsets[1:] > offsets[:-1]) & self.live(segment, ids)
+                if author_id is not None:
+                    mask &= cold.column("author_id") == np.uint64(author_id)
+                content = cold.raw("content")
+                found.extend(
+                    (int(ids[i]), content[offsets[i]:offsets[i + 1]].decode("utf-8"))
+                    for i in np.flatnonzero(mask)[::-1][:limit]
+                )
+            found.sort(key=lambda item: item[0], reverse=True)
+            del found[limit:]
+        return [text for _, text in found]
+
+    def channel_totals(self, channel_id, approximate=False):
+        """Aggregate a channel's cold messages like MessageIndex.range_stats
+
+        Segments without deletions are summed from the catalog and their
+        author columns; the others (and pending ones) are aggregated from
+        their live rows.
+        """
+        totals = {
+            "message_count": 0,
+            "total_attachments": 0,
+            "total_embeds": 0,
+            "oldest_message": None,
+            "oldest_id": None,
+            "newest_id": None,
+            "authors": HyperLogLog() if approximate else set()
+        }
+        for segment in self.index.cold_segments(channel_id=channel_id):
+            with ColdSegment(segment["path"]) as cold:
+                if not segment["deleted"] and not segment["pending"]:
+                    authors = cold.column("authors")
+                    part = segment
+                else:
+                    ids = cold.column("id")
+                    mask = self.live(segment, ids)
+                    if not mask.any():
+                        continue
+                    authors = np.unique(cold.column("author_id")[mask])
+                    part = {
+                        "message_count": int(mask.sum()),
+                        "total_attachments": int(cold.column("attachments")[mask].sum()),
+                        "total_embeds": int(cold.column("embeds")[mask].sum()),
+                        "oldest_message": float(cold.column("created_at")[mask].min()),
+                        "min_id": int(ids[mask].min()),
+                        "max_id": int(ids[mask].max())
+                    }
+            if approximate:
+                totals["authors"].update(authors)
+            else:
+                totals["authors"].update(authors.tolist())
+            for key in ("message_count", "total_attachments", "total_embeds"):
+                totals[key] += part[key]
+            for key, value, pick in (
+                ("oldest_message", part["oldest_message"], min),
+                ("oldest_id", part["min_id"], min),
+                ("newest_id", part["max_id"], max)
+            ):
+                totals[key] = value if totals[key] is None else pick(totals[key], value)
+        return totals
+
+    def live(self, segment, ids):
+        """Mask of a segment's rows that are served from cold storage
+
+        Rows of messages deleted since compaction are left out, and so are
+        rows of a pending segment that are still in the index.
+        """
+        mask = np.ones(len(ids), dtype=bool)
+        if segment["deleted"]:
+            deleted = self.index.cold_deleted(segment["channel_id"], segment["min_id"], segment["max_id"])
+            mask &= ~np.isin(ids, np.array(deleted, dtype=np.uint64))
+        if segment["pending"]:
+            hot = self.index.message_ids(
+                channel_id=segment["channel_id"], after_id=segment["min_id"] - 1, before_id=segment["max_id"] + 1
+            )
+            mask &= ~np.isin(ids, np.array(hot, dtype=np.uint64))
+        return mask
+
+    def stats(self):
+        """Get compaction counters"""
+        return {
+            "runs": self.runs,
+            "segments_written": self.segments_written,
+            "messages_compacted": self.messages_compacted,
+            "bytes_written": self.bytes_written,
+            "last_run_seconds": self.last_run_seconds
+        }
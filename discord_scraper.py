@@ -12,6 +12,9 @@ import os
 from dotenv import load_dotenv
 from datetime import datetime
 import re
+from archive import ArchiveWriter
+from export import save_ndjson_gz
+from records import MessageRecord, record_default
 
 # Load environment variables.
 load_dotenv()
@@ -242,13 +245,13 @@ class DiscordScraper:
                     reactions = msg_elem.find_elements(By.CSS_SELECTOR, '[class*="reaction"]')
                     reaction_count = len(reactions)
                     
-                    messages_data.append({
-                        "username": username,
-                        "content": content,
-                        "timestamp": timestamp,
-                        "attachments": attachment_count,
-                        "reactions": reaction_count
-                    })
+                    messages_data.append(MessageRecord(
+                        author_name=username,
+                        content=content,
+                        created_at=MessageRecord.parse_timestamp(timestamp),
+                        attachments=attachment_count,
+                        reactions=reaction_count
+                    ))
                     
                 except Exception as e:
                     continue
@@ -273,8 +276,8 @@ class DiscordScraper:
         user_data["message_count"] = len(messages)
         
         # Calculate statistics
-        total_attachments = sum(msg.get("attachments", 0) for msg in messages)
-        total_reactions = sum(msg.get("reactions", 0) for msg in messages)
+        total_attachments = sum(msg.attachments for msg in messages)
+        total_reactions = sum(msg.reactions for msg in messages)
         
         user_data["total_attachments"] = total_attachments
         user_data["total_reactions"] = total_reactions
@@ -302,13 +305,13 @@ class DiscordScraper:
             # Get unique authors
             unique_authors = set()
             for msg in messages:
-                if msg.get("username"):
-                    unique_authors.add(msg["username"])
+                if msg.author_name:
+                    unique_authors.add(msg.author_name)
             stats["unique_authors"] = len(unique_authors)
             
             # Count attachments and reactions
-            stats["total_attachments"] = sum(msg.get("attachments", 0) for msg in messages)
-            stats["total_reactions"] = sum(msg.get("reactions", 0) for msg in messages)
+            stats["total_attachments"] = sum(msg.attachments for msg in messages)
+            stats["total_reactions"] = sum(msg.reactions for msg in messages)
             
             return stats
             
@@ -317,10 +320,19 @@ class DiscordScraper:
             return {}
     
     def save_data(self, data, filename):
-        """Save scraped data to JSON file"""
+        """Save scraped data to JSON file (gzip NDJSON for .ndjson.gz, appended for .archive)"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if filename.endswith(".archive"):
+                # Append only the new records to a crash-safe segmented archive
+                archive = ArchiveWriter(filename)
+                archive.append(data if isinstance(data, list) else [data])
+                archive.close()
+            elif filename.endswith(".ndjson.gz"):
+                # Stream record lists one line at a time instead of one big document
+                save_ndjson_gz(data, filename)
+            else:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False, default=record_default)
             print(f"Data saved to {filename}")
             return True
         except Exception as e:
@@ -401,12 +413,14 @@ def main():
                 limit = int(limit) if limit.isdigit() else 50
                 messages = scraper.scrape_messages(limit=limit)
                 print(f"\nScraped {len(messages)} messages")
-                print(json.dumps(messages[:10], indent=2))  # Show first 10
+                print(json.dumps(messages[:10], indent=2, default=record_default))  # Show first 10
                 
-                save = input("\nSave all messages to file? (y/n): ").strip().lower()
+                save = input("\nSave all messages to file? (y/n, a = append to archive): ").strip().lower()
                 if save == 'y':
-                    filename = f"messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                    filename = f"messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
                     scraper.save_data(messages, filename)
+                elif save == 'a':
+                    scraper.save_data(messages, "messages.archive")
             
             elif choice == "5":
                 username = input("Enter username to filter: ").strip()
@@ -414,18 +428,20 @@ def main():
                 limit = int(limit) if limit.isdigit() else 50
                 messages = scraper.scrape_messages(limit=limit, username_filter=username)
                 print(f"\nScraped {len(messages)} messages from {username}")
-                print(json.dumps(messages[:10], indent=2))  # Show first 10
+                print(json.dumps(messages[:10], indent=2, default=record_default))  # Show first 10
                 
-                save = input("\nSave all messages to file? (y/n): ").strip().lower()
+                save = input("\nSave all messages to file? (y/n, a = append to archive): ").strip().lower()
                 if save == 'y':
-                    filename = f"messages_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                    filename = f"messages_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
                     scraper.save_data(messages, filename)
+                elif save == 'a':
+                    scraper.save_data(messages, f"messages_{username}.archive")
             
             elif choice == "6":
                 username = input("Enter username: ").strip()
                 user_info = scraper.get_user_info(username)
                 print("\nUser Information:")
-                print(json.dumps(user_info, indent=2))
+                print(json.dumps(user_info, indent=2, default=record_default))
                 
                 save = input("\nSave to file? (y/n): ").strip().lower()
                 if save == 'y':
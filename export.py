@@ -0,0 +1,45 @@
+import gzip
+import json
+import tempfile
+
+from records import record_default
+
+# Exports larger than this spill from memory to a temporary file on disk
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def write_ndjson_gz(records, fileobj):
+    """Stream records as gzip-compressed NDJSON (one JSON object per line) into fileobj
+
+    Records are encoded one at a time, so memory use doesn't grow with the
+    number of records. Returns the number of records written.
+    """
+    count = 0
+    with gzip.GzipFile(fileobj=fileobj, mode="wb") as gz:
+        for record in records:
+            gz.write(json.dumps(record, ensure_ascii=False, default=record_default).encode("utf-8"))
+            gz.write(b"\n")
+            count += 1
+    return count
+
+
+def spool_ndjson_gz(records, max_memory=SPOOL_MAX_MEMORY):
+    """Write records as gzip NDJSON to a spooled temp file, rewound for reading"""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    write_ndjson_gz(records, spool)
+    spool.seek(0)
+    return spool
+
+
+def save_ndjson_gz(records, filename):
+    """Stream records as gzip NDJSON to a file"""
+    with open(filename, "wb") as f:
+        return write_ndjson_gz(records, f)
+
+
+def read_ndjson_gz(filename):
+    """Iterate over the records of a gzip NDJSON file"""
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,65 @@
+import discord
+
+
+def render_channel_list(guild):
+    """Render the guild's channel tree as the analyze_server channel list"""
+    lines = ["**Channel List:**\n"]
+    for category in sorted(guild.categories, key=lambda x: x.position):
+        lines.append(f"\n📁 **{category.name}**\n")
+        for channel in sorted(category.channels, key=lambda x: x.position):
+            if isinstance(channel, discord.TextChannel):
+                lines.append(f"   {channel.mention} ({channel.topic or 'No topic'})\n")
+            elif isinstance(channel, discord.VoiceChannel):
+                lines.append(f"  🔊 {channel.name}\n")
+
+    # Add uncategorized channels
+    uncategorized = [ch for ch in guild.channels if ch.category is None]
+    if uncategorized:
+        lines.append("\n**Uncategorized:**\n")
+        for channel in uncategorized:
+            if isinstance(channel, discord.TextChannel):
+                lines.append(f"   {channel.mention}\n")
+            elif isinstance(channel, discord.VoiceChannel):
+                lines.append(f"   {channel.name}\n")
+    return "".join(lines)
+
+
+class GuildSnapshotCache:
+    def __init__(self):
+        """Cache of per-guild channel structure, invalidated by gateway events"""
+        self.snapshots = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, guild):
+        """Get the structure snapshot of a guild, building it on a miss"""
+        snapshot = self.snapshots.get(guild.id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        snapshot = {
+            "channels": {
+                "text_channels": len(guild.text_channels),
+                "voice_channels": len(guild.voice_channels),
+                "categories": len(guild.categories),
+                "total": len(guild.channels)
+            },
+            "channel_list": render_channel_list(guild)
+        }
+        self.snapshots[guild.id] = snapshot
+        return snapshot
+
+    def invalidate(self, guild_id):
+        """Drop a guild's snapshot so the next get rebuilds it"""
+        self.snapshots.pop(guild_id, None)
+
+    def stats(self):
+        """Get cache size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.snapshots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
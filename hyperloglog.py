@@ -0,0 +1,81 @@
+import numpy as np
+
+# Registers are indexed by the low PRECISION bits of a value's hash
+PRECISION = 12
+
+
+def hash64(values):
+    """Mix 64-bit integer ids into well-distributed 64-bit hashes (splitmix64)"""
+    h = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+class HyperLogLog:
+    def __init__(self, precision=PRECISION):
+        """Mergeable approximate distinct counter of 64-bit ids in 2^precision bytes
+
+        The relative standard error is 1.04 / sqrt(2^precision): 1.6% at the
+        default precision of 12 (4 KiB), so counts are within ±3.25% about 95%
+        of the time. Small counts fall back to linear counting and are
+        close to exact.
+        """
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def error(self):
+        """Relative standard error of count()"""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        """Add a batch of integer ids"""
+        if len(values) == 0:
+            return
+        hashes = hash64(values)
+        index = (hashes & np.uint64(len(self.registers) - 1)).astype(np.intp)
+        rest = hashes >> np.uint64(self.precision)
+        # Rank = position of the lowest set bit of the remaining hash bits;
+        # an isolated power of two converts to float64 exactly
+        lowest = rest & (~rest + np.uint64(1))
+        with np.errstate(divide="ignore"):
+            ranks = np.log2(lowest.astype(np.float64)) + 1
+        ranks = np.where(rest == 0, 64 - self.precision + 1, ranks).astype(np.uint8)
+        np.maximum.at(self.registers, index, ranks)
+
+    def add(self, value):
+        """Add one integer id"""
+        self.update([value])
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def copy(self):
+        """Get an independent copy of this sketch"""
+        sketch = HyperLogLog(self.precision)
+        sketch.registers[:] = self.registers
+        return sketch
+
+    def count(self):
+        """Estimate the number of distinct ids added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    @classmethod
+    def merged(cls, sketches, precision=PRECISION):
+        """Get the union of several sketches as a new sketch"""
+        union = cls(precision)
+        for sketch in sketches:
+            union.merge(sketch)
+        return union
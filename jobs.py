@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+
+from metrics import current_command
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class Job:
+    def __init__(self, job_id, key, name, priority, run, command):
+        """One unit of background work, shared by every request with the same key"""
+        self.id = job_id
+        self.key = key
+        self.name = name
+        self.priority = priority
+        self.run = run
+        self.command = command
+        self.status = "queued"
+        self.waiters = 1
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.future = asyncio.get_running_loop().create_future()
+
+    async def wait(self):
+        """Wait for the job's result (raises the job's exception if it failed)"""
+        return await asyncio.shield(self.future)
+
+
+class JobQueue:
+    def __init__(self, workers=4, history=50):
+        """Priority job queue with a bounded worker pool and single-flight coalescing"""
+        self.worker_count = workers
+        self.queue = None
+        self.workers = []
+        self.in_flight = {}
+        self.recent = deque(maxlen=history)
+        self.ids = itertools.count(1)
+        self.order = itertools.count()
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, key, name, run, priority=PRIORITY_NORMAL):
+        """Queue run() under key, or join the identical job already queued or running
+
+        run is a zero-argument callable returning a coroutine. Returns the Job;
+        await job.wait() for its result.
+        """
+        self.start()
+        self.submitted += 1
+        job = self.in_flight.get(key)
+        if job is not None:
+            self.coalesced += 1
+            job.waiters += 1
+            if job.status == "queued" and priority < job.priority:
+                # Re-queue at the higher priority; the stale entry is skipped later
+                job.priority = priority
+                self.queue.put_nowait((priority, next(self.order), job))
+            return job
+        job = Job(next(self.ids), key, name, priority, run, current_command.get())
+        self.in_flight[key] = job
+        self.queue.put_nowait((priority, next(self.order), job))
+        return job
+
+    def start(self):
+        """Start the worker pool if it isn't running"""
+        if self.queue is None:
+            self.queue = asyncio.PriorityQueue()
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        while len(self.workers) < self.worker_count:
+            self.workers.append(asyncio.create_task(self.worker()))
+
+    async def worker(self):
+        """Run queued jobs in priority order"""
+        while True:
+            priority, _, job = await self.queue.get()
+            if job.status != "queued" or priority != job.priority:
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            # Attribute the job's API calls to the command that submitted it
+            token = current_command.set(job.command)
+            try:
+                result = await job.run()
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self.failed += 1
+                job.future.set_exception(e)
+            else:
+                job.status = "done"
+                self.completed += 1
+                job.future.set_result(result)
+            finally:
+                current_command.reset(token)
+                if not job.future.done():
+                    # Cancelled (e.g. at shutdown): fail the job so its waiters don't hang,
+                    # and replace this worker once it has exited
+                    job.status = "cancelled"
+                    job.error = "cancelled"
+                    self.failed += 1
+                    job.future.set_exception(RuntimeError(f"Job {job.name} was cancelled"))
+                    asyncio.get_running_loop().call_soon(self.start)
+                job.finished_at = time.time()
+                self.in_flight.pop(job.key, None)
+                self.recent.append(job)
+                # Nobody may be left waiting on a failed job
+                if job.future.done() and not job.future.cancelled():
+                    job.future.exception()
+
+    def active_jobs(self):
+        """Get queued and running jobs, running first"""
+        return sorted(self.in_flight.values(), key=lambda job: (job.status != "running", job.priority, job.id))
+
+    def stats(self):
+        """Get queue depth and job counters"""
+        return {
+            "queued": sum(1 for job in self.in_flight.values() if job.status == "queued"),
+            "running": sum(1 for job in self.in_flight.values() if job.status == "running"),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "failed": self.failed
+        }
@@ -0,0 +1,158 @@
+import heapq
+import time
+
+import numpy as np
+
+
+class CountMinSketch:
+    def __init__(self, width=2048, depth=4):
+        """Fixed-size frequency sketch that never underestimates a key's count
+
+        With conservative updates, an estimate exceeds the true count by at
+        most e / width * (total of all counts) with probability 1 - e^-depth,
+        e.g. 0.13% of the total with 98% confidence at the defaults.
+        """
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self.rows = np.arange(depth)
+        self.total = 0
+
+    def columns(self, key):
+        """Get the key's counter column in each row"""
+        return np.array([hash((row, key)) % self.width for row in range(self.depth)])
+
+    def add(self, key, amount=1):
+        """Count key amount more times and return its new estimated count"""
+        columns = self.columns(key)
+        cells = self.table[self.rows, columns]
+        # Conservative update: only raise the counters that are at the minimum
+        estimate = int(cells.min()) + amount
+        self.table[self.rows, columns] = np.maximum(cells, estimate)
+        self.total += amount
+        return estimate
+
+    def estimate(self, key):
+        """Get the key's estimated count"""
+        return int(self.table[self.rows, self.columns(key)].min())
+
+
+class TopK:
+    def __init__(self, k=25, width=2048, depth=4, exact_limit=256):
+        """Approximate k most frequent keys of a stream, in bounded memory
+
+        Keys are counted exactly until there are more than exact_limit of
+        them; only then is a count-min sketch allocated and seeded with the
+        exact counts, so quiet guilds don't pay for a full sketch. Only the
+        current top k keys are kept, in a min-heap so the smallest can be
+        replaced in O(log k).
+        """
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.exact_limit = exact_limit
+        self.exact = {}
+        self.sketch = None
+        self.top = {}
+        self.heap = []
+
+    def count(self, key, amount):
+        """Add to the key's count and return its new (estimated) count"""
+        if self.sketch is not None:
+            return self.sketch.add(key, amount)
+        count = self.exact[key] = self.exact.get(key, 0) + amount
+        if len(self.exact) > self.exact_limit:
+            # Too many keys to count exactly: switch to the fixed-size sketch
+            self.sketch = CountMinSketch(self.width, self.depth)
+            for counted, value in self.exact.items():
+                self.sketch.add(counted, value)
+            self.exact = None
+            return self.sketch.estimate(key)
+        return count
+
+    def add(self, key, amount=1):
+        """Count one occurrence of key"""
+        estimate = self.count(key, amount)
+        if key in self.top:
+            self.top[key] = estimate
+            heapq.heappush(self.heap, (estimate, key))
+        elif len(self.top) < self.k:
+            self.top[key] = estimate
+            heapq.heappush(self.heap, (estimate, key))
+        elif estimate > self.minimum():
+            _, evicted = heapq.heappop(self.heap)
+            del self.top[evicted]
+            self.top[key] = estimate
+            heapq.heappush(self.heap, (estimate, key))
+        if len(self.heap) > 4 * self.k:
+            # Drop stale heap entries left behind by count updates
+            self.heap = [(count, key) for key, count in self.top.items()]
+            heapq.heapify(self.heap)
+
+    def minimum(self):
+        """Get the smallest count in the top k, discarding stale heap entries"""
+        while self.heap:
+            count, key = self.heap[0]
+            if self.top.get(key) == count:
+                return count
+            heapq.heappop(self.heap)
+        return 0
+
+    def items(self, limit=None):
+        """Get (key, estimated count) pairs, most frequent first"""
+        ranked = sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    def nbytes(self):
+        """Approximate memory used by the sketch (0 while counting exactly)"""
+        return self.sketch.table.nbytes if self.sketch is not None else 0
+
+
+class GuildLeaderboards:
+    def __init__(self, k=25, width=2048, depth=4, exact_limit=256):
+        """Per-guild top authors, most reacted-to messages and busiest channels"""
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.exact_limit = exact_limit
+        self.guilds = {}
+        self.events = 0
+
+    def boards(self, guild_id):
+        """Get (creating on first use) a guild's leaderboards"""
+        boards = self.guilds.get(guild_id)
+        if boards is None:
+            boards = {
+                "authors": TopK(self.k, self.width, self.depth, self.exact_limit),
+                "messages": TopK(self.k, self.width, self.depth, self.exact_limit),
+                "channels": TopK(self.k, self.width, self.depth, self.exact_limit),
+                "since": time.time()
+            }
+            self.guilds[guild_id] = boards
+        return boards
+
+    def record_message(self, guild_id, channel_id, author_id):
+        """Count a new message for its author and channel"""
+        boards = self.boards(guild_id)
+        boards["authors"].add(author_id)
+        boards["channels"].add(channel_id)
+        self.events += 1
+
+    def record_reaction(self, guild_id, channel_id, message_id):
+        """Count a reaction added to a message"""
+        self.boards(guild_id)["messages"].add((channel_id, message_id))
+        self.events += 1
+
+    def discard(self, guild_id):
+        """Forget a guild's leaderboards (e.g. after leaving it)"""
+        self.guilds.pop(guild_id, None)
+
+    def stats(self):
+        """Get the number of tracked guilds, events, sketched rankings and sketch memory"""
+        boards = [board for guild in self.guilds.values() for name, board in guild.items() if name != "since"]
+        return {
+            "guilds": len(self.guilds),
+            "events": self.events,
+            "sketches": sum(board.sketch is not None for board in boards),
+            "sketch_bytes": sum(board.nbytes() for board in boards)
+        }
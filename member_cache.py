@@ -0,0 +1,95 @@
+import asyncio
+from collections import OrderedDict
+
+import discord
+
+# Rough per-member footprint of discord.py's member cache (Member + User + role list),
+# used to estimate what lazy mode saves
+MEMBER_BYTES_ESTIMATE = 1200
+
+
+class MemberLRU:
+    def __init__(self, maxsize=5000):
+        """Size-bounded LRU cache of members fetched on demand"""
+        self.maxsize = maxsize
+        self.members = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def put(self, member):
+        """Remember a member, evicting the least recently used one when full"""
+        key = (member.guild.id, member.id)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        while len(self.members) > self.maxsize:
+            self.members.popitem(last=False)
+
+    def discard(self, guild_id, user_id):
+        """Forget a member (e.g. after they left the guild)"""
+        self.members.pop((guild_id, user_id), None)
+
+    async def get(self, guild, user_id):
+        """Get a member from the client cache, this LRU, or the API, in that order
+
+        Misses are resolved with a targeted gateway chunk request for the one
+        user, falling back to a REST fetch. Returns None if the user isn't a
+        member of the guild.
+        """
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        key = (guild.id, user_id)
+        member = self.members.get(key)
+        if member is not None:
+            self.hits += 1
+            self.members.move_to_end(key)
+            return member
+        self.misses += 1
+        self.fetches += 1
+        try:
+            found = await guild.query_members(user_ids=[user_id], limit=1, cache=False)
+            member = found[0] if found else None
+        except (discord.ClientException, asyncio.TimeoutError):
+            member = None
+        if member is None:
+            try:
+                member = await guild.fetch_member(user_id)
+            except discord.HTTPException:
+                # Not a member, or the bot can't see them: callers show "Unknown"
+                return None
+        self.put(member)
+        return member
+
+    def stats(self):
+        """Get cache size and hit/miss counters"""
+        return {
+            "size": len(self.members),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches
+        }
+
+
+def startup_report(client, started_at, ready_at, baseline=None):
+    """Summarize startup time and how much member caching lazy mode avoided
+
+    baseline is the startup_report of the last start that cached every
+    member; when given, the READY time saved against it is included.
+    """
+    cached = sum(len(guild.members) for guild in client.guilds)
+    total = sum(guild.member_count or 0 for guild in client.guilds)
+    skipped = max(0, total - cached)
+    report = {
+        "ready_seconds": ready_at - started_at,
+        "guilds": len(client.guilds),
+        "members_total": total,
+        "members_cached": cached,
+        "members_not_cached": skipped,
+        "estimated_bytes_saved": skipped * MEMBER_BYTES_ESTIMATE
+    }
+    if baseline and "ready_seconds" in baseline:
+        report["baseline_ready_seconds"] = baseline["ready_seconds"]
+        report["ready_seconds_saved"] = baseline["ready_seconds"] - report["ready_seconds"]
+    return report
@@ -0,0 +1,578 @@
+import itertools
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from hyperloglog import HyperLogLog
+
+# An upsert rather than INSERT OR REPLACE, so the update trigger keeps the
+# full-text index in sync (REPLACE deletes skip delete triggers)
+UPSERT_MESSAGE = """
+    INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        edited_at = excluded.edited_at, content = excluded.content,
+        attachments = excluded.attachments, embeds = excluded.embeds,
+        reactions = excluded.reactions
+"""
+
+
+class MessageIndex:
+    def __init__(self, path="message_index.db"):
+        """Open (or create) the on-disk message index"""
+        self.path = path
+        self.lock = threading.Lock()
+        # Sharded worker processes share the database, so wait out their write locks
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+    def create_tables(self):
+        """Create the index tables if they don't exist yet"""
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY,
+                    guild_id INTEGER,
+                    channel_id INTEGER NOT NULL,
+                    author_id INTEGER NOT NULL,
+                    author_bot INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    edited_at REAL,
+                    content TEXT NOT NULL DEFAULT '',
+                    attachments INTEGER NOT NULL DEFAULT 0,
+                    embeds INTEGER NOT NULL DEFAULT 0,
+                    reactions INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages (channel_id, id)"
+            )
+            # Secondary index for per-author lookups
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_author ON messages (channel_id, author_id, id)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_guild_author ON messages (guild_id, author_id, id)"
+            )
+            self.create_search_index()
+            # Per-channel history backfill cursors
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS backfill_state (
+                    channel_id INTEGER PRIMARY KEY,
+                    oldest_id INTEGER,
+                    newest_id INTEGER,
+                    complete INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            # Catalog of compacted cold segments, for skipping segments by
+            # channel and id/time range without opening them
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cold_segments (
+                    path TEXT PRIMARY KEY,
+                    guild_id INTEGER,
+                    channel_id INTEGER NOT NULL,
+                    month TEXT NOT NULL,
+                    message_count INTEGER NOT NULL,
+                    min_id INTEGER NOT NULL,
+                    max_id INTEGER NOT NULL,
+                    oldest_message REAL,
+                    newest_message REAL,
+                    total_attachments INTEGER NOT NULL,
+                    total_embeds INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    pending INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(cold_segments)")]
+            if "pending" not in columns:
+                # Catalogs created before segments were retired in chunks
+                self.conn.execute("ALTER TABLE cold_segments ADD COLUMN pending INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cold_segments_channel ON cold_segments (channel_id, min_id)"
+            )
+            # Tombstones for compacted messages deleted later, since segments are read-only
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cold_deleted (
+                    channel_id INTEGER NOT NULL,
+                    id INTEGER NOT NULL,
+                    PRIMARY KEY (channel_id, id)
+                ) WITHOUT ROWID
+            """)
+            # Shard health shared by all worker processes
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS shard_status (
+                    shard_id INTEGER PRIMARY KEY,
+                    pid INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    latency REAL,
+                    guild_count INTEGER,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def create_search_index(self):
+        """Create the FTS5 full-text index over message content, kept in sync by triggers"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        self.conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+            USING fts5(content, content='messages', content_rowid='id')
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+            END
+        """)
+        if not exists:
+            # Index messages stored before full-text search existed
+            self.conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        # Compacted messages keep their own full-text rows. The table is
+        # contentless (the text is in the segments), and channel and author
+        # are indexed as tokens so MATCH can filter on them
+        row = self.conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'cold_fts'").fetchone()
+        if row and "content=''" not in row[0]:
+            # Tables from before cold_fts was contentless stored a second copy of the text
+            self.conn.execute("DROP TABLE cold_fts")
+            row = None
+        self.conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS cold_fts
+            USING fts5(content, channel_id, author_id, content='')
+        """)
+        # A new table is filled from the existing segments by the next compaction run
+        self.rebuild_cold_search = row is None
+
+    @staticmethod
+    def message_row(message):
+        """Convert a discord.Message into an index row"""
+        return (
+            message.id,
+            message.guild.id if message.guild else None,
+            message.channel.id,
+            message.author.id,
+            int(message.author.bot),
+            message.created_at.timestamp(),
+            message.edited_at.timestamp() if message.edited_at else None,
+            message.content or "",
+            len(message.attachments),
+            len(message.embeds),
+            sum(reaction.count for reaction in message.reactions),
+        )
+
+    def add_messages(self, messages):
+        """Insert or update a batch of discord.Message objects"""
+        rows = [self.message_row(message) for message in messages]
+        if not rows:
+            return 0
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT_MESSAGE, rows)
+        return len(rows)
+
+    @staticmethod
+    def edit_fields(data):
+        """Get the columns a raw MESSAGE_UPDATE payload changes"""
+        fields = {}
+        if "content" in data:
+            fields["content"] = data["content"] or ""
+        if "attachments" in data:
+            fields["attachments"] = len(data["attachments"])
+        if "embeds" in data:
+            fields["embeds"] = len(data["embeds"])
+        if data.get("edited_timestamp"):
+            fields["edited_at"] = _parse_timestamp(data["edited_timestamp"])
+        return fields
+
+    def apply_edit(self, message_id, fields):
+        """Update the given columns of one message (caller holds the lock and transaction)"""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self.conn.execute(
+            f"UPDATE messages SET {assignments} WHERE id = ?",
+            (*fields.values(), message_id),
+        )
+
+    def apply_events(self, events):
+        """Apply a batch of buffered gateway events in order, in one transaction
+
+        events are (kind, args) pairs: ("message", row), ("edit", (id, fields)),
+        ("delete", (id, channel_id)), ("reaction", (delta, id)) and
+        ("reaction_clear", (id,)). Consecutive events of the same kind are
+        written with one executemany.
+        """
+        with self.lock, self.conn:
+            for kind, group in itertools.groupby(events, key=lambda event: event[0]):
+                args = [event[1] for event in group]
+                if kind == "message":
+                    self.conn.executemany(UPSERT_MESSAGE, args)
+                elif kind == "edit":
+                    for message_id, fields in args:
+                        self.apply_edit(message_id, fields)
+                elif kind == "delete":
+                    ids = [(message_id,) for message_id, _ in args]
+                    self.conn.executemany("DELETE FROM messages WHERE id = ?", ids)
+                    # A compacted message can't be removed from its segment, so
+                    # leave a tombstone for cold readers to skip it
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO cold_deleted SELECT channel_id, ? FROM cold_segments "
+                        "WHERE channel_id = ? AND min_id <= ? AND max_id >= ? LIMIT 1",
+                        [(message_id, channel_id, message_id, message_id) for message_id, channel_id in args],
+                    )
+                elif kind == "reaction":
+                    self.conn.executemany(
+                        "UPDATE messages SET reactions = MAX(0, reactions + ?) WHERE id = ?", args
+                    )
+                elif kind == "reaction_clear":
+                    self.conn.executemany("UPDATE messages SET reactions = 0 WHERE id = ?", args)
+                else:
+                    raise ValueError(f"Unknown event kind: {kind}")
+        return len(events)
+
+    def get_cursor(self, channel_id):
+        """Get the backfill cursor for a channel, or None if it was never backfilled"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT oldest_id, newest_id, complete, updated_at FROM backfill_state WHERE channel_id = ?",
+                (channel_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "oldest_id": row[0],
+            "newest_id": row[1],
+            "complete": bool(row[2]),
+            "updated_at": row[3],
+        }
+
+    def save_cursor(self, channel_id, oldest_id, newest_id, complete, updated_at):
+        """Persist the backfill cursor for a channel"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO backfill_state VALUES (?, ?, ?, ?, ?)",
+                (channel_id, oldest_id, newest_id, int(complete), updated_at),
+            )
+
+    def author_messages(self, channel_id, author_id, limit):
+        """Get an author's newest indexed messages in a channel as dicts"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT * FROM messages WHERE channel_id = ? AND author_id = ? AND author_bot = 0 "
+                "ORDER BY id DESC LIMIT ?",
+                (channel_id, author_id, limit),
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def message_ids(self, guild_id=None, channel_id=None, author_id=None, after_id=None, before_id=None,
+                    channel_ids=None):
+        """Get the ids of indexed messages matching the given filters"""
+        conditions = []
+        params = []
+        for column, value in (("guild_id", guild_id), ("channel_id", channel_id), ("author_id", author_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if channel_ids is not None:
+            if not channel_ids:
+                return []
+            conditions.append(f"channel_id IN ({', '.join('?' for _ in channel_ids)})")
+            params.extend(channel_ids)
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        if before_id is not None:
+            conditions.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            return [row[0] for row in self.conn.execute(f"SELECT id FROM messages {where}", params)]
+
+    def message_contents(self, channel_ids, author_id=None, limit=5000):
+        """Get the text of the newest indexed non-bot messages in the given channels"""
+        if not channel_ids:
+            return []
+        conditions = [f"channel_id IN ({', '.join('?' for _ in channel_ids)})", "author_bot = 0", "content != ''"]
+        params = list(channel_ids)
+        if author_id is not None:
+            conditions.append("author_id = ?")
+            params.append(author_id)
+        params.append(limit)
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                f"SELECT content FROM messages WHERE {' AND '.join(conditions)} ORDER BY id DESC LIMIT ?",
+                params,
+            )]
+
+    def range_stats(self, channel_id, outside=None, approximate=False):
+        """Aggregate a channel's indexed messages, optionally only those outside an id range
+
+        outside=(oldest_id, newest_id) selects rows older or newer than the
+        range, i.e. those indexed since aggregates over that range were taken.
+        With approximate=True, authors is a HyperLogLog sketch instead of a set.
+        """
+        where = "channel_id = ?"
+        params = [channel_id]
+        if outside is not None:
+            where += " AND (id < ? OR id > ?)"
+            params.extend(outside)
+        with self.lock:
+            row = self.conn.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(attachments), 0), COALESCE(SUM(embeds), 0),
+                       MIN(created_at), MIN(id), MAX(id)
+                FROM messages WHERE {where}
+            """, params).fetchone()
+            cursor = self.conn.execute(f"SELECT DISTINCT author_id FROM messages WHERE {where}", params)
+            if approximate:
+                # Stream the ids into a fixed-size sketch instead of holding them all
+                authors = HyperLogLog()
+                while True:
+                    batch = cursor.fetchmany(10000)
+                    if not batch:
+                        break
+                    authors.update([author[0] for author in batch])
+            else:
+                authors = {author[0] for author in cursor}
+        return {
+            "message_count": row[0],
+            "total_attachments": row[1],
+            "total_embeds": row[2],
+            "oldest_message": row[3],
+            "oldest_id": row[4],
+            "newest_id": row[5],
+            "authors": authors
+        }
+
+    def search(self, query, channel_ids, author_id=None, after=None, before=None, limit=10):
+        """Full-text search over the given channels, best matches first
+
+        query takes keywords and "quoted phrases" (all must match); a trailing
+        * makes a keyword a prefix match. after/before are epoch seconds.
+        Returns dicts with the message row, a highlighted snippet and the
+        bm25 rank (lower is better), for merging with ColdStore.search.
+        """
+        match = fts_query(query)
+        if not match or not channel_ids:
+            return []
+        conditions = [f"m.channel_id IN ({', '.join('?' for _ in channel_ids)})"]
+        params = [match, *channel_ids]
+        if author_id is not None:
+            conditions.append("m.author_id = ?")
+            params.append(author_id)
+        if after is not None:
+            conditions.append("m.created_at >= ?")
+            params.append(after)
+        if before is not None:
+            conditions.append("m.created_at < ?")
+            params.append(before)
+        params.append(limit)
+        with self.lock:
+            cursor = self.conn.execute(f"""
+                SELECT m.*, snippet(messages_fts, 0, '**', '**', '…', 16) AS snippet, rank
+                FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ? AND {' AND '.join(conditions)}
+                ORDER BY rank LIMIT ?
+            """, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def cold_search(self, query, channel_ids, author_id=None, after_id=None, before_id=None, limit=10):
+        """Full-text search over compacted messages, returning (id, rank) pairs, best first
+
+        Channel and author filters are part of the MATCH expression and the
+        time range is an id range (after_id <= id < before_id). Tombstoned
+        messages are skipped.
+        """
+        match = fts_query(query)
+        if not match or not channel_ids:
+            return []
+        match = f"content : ({match}) AND channel_id : ({' OR '.join(str(int(c)) for c in channel_ids)})"
+        if author_id is not None:
+            match += f" AND author_id : {int(author_id)}"
+        conditions = ["cold_fts MATCH ?", "rowid NOT IN (SELECT id FROM cold_deleted)"]
+        params = [match]
+        if after_id is not None:
+            conditions.append("rowid >= ?")
+            params.append(after_id)
+        if before_id is not None:
+            conditions.append("rowid < ?")
+            params.append(before_id)
+        params.append(limit)
+        with self.lock:
+            # Only the content column counts towards the rank
+            return self.conn.execute(f"""
+                SELECT rowid, bm25(cold_fts, 1.0, 0.0, 0.0) AS score FROM cold_fts
+                WHERE {' AND '.join(conditions)}
+                ORDER BY score LIMIT ?
+            """, params).fetchall()
+
+    def add_cold_search(self, rows):
+        """Index (id, content, channel_id, author_id) rows of compacted messages for cold search"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO cold_fts (rowid, content, channel_id, author_id) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def merge_search_index(self, table, pages=500):
+        """Merge part of a full-text index's b-trees and purge deleted entries
+
+        Each call does a bounded amount of work in its own transaction, like
+        a slice of FTS5's 'optimize'. Returns False once the index is fully merged.
+        """
+        if table not in ("messages_fts", "cold_fts"):
+            raise ValueError(f"Unknown search index: {table}")
+        with self.lock, self.conn:
+            changes = self.conn.total_changes
+            self.conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)", (-pages,))
+            return self.conn.total_changes - changes >= 2
+
+    def cold_candidates(self, before_id):
+        """Get (channel_id, guild_id, oldest id, count) of channels with messages older than before_id"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT channel_id, MAX(guild_id), MIN(id), COUNT(*) FROM messages WHERE id < ? GROUP BY channel_id",
+                (before_id,),
+            ).fetchall()
+
+    def channel_rows(self, channel_id, after_id, before_id, limit):
+        """Get a channel's indexed messages with after_id <= id < before_id, oldest first, as dicts"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT * FROM messages WHERE channel_id = ? AND id >= ? AND id < ? ORDER BY id LIMIT ?",
+                (channel_id, after_id, before_id, limit),
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def catalog_cold_segment(self, segment, message_ids):
+        """Catalog a written cold segment as pending until its messages have left the index
+
+        message_ids are the ids written to the segment. Any that were deleted
+        from the index after the rows were read had no segment to leave a
+        tombstone in, so they are tombstoned in the same transaction.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cold_segments (path, guild_id, channel_id, month, message_count, "
+                "min_id, max_id, oldest_message, newest_message, total_attachments, total_embeds, created_at, pending) "
+                "VALUES (:path, :guild_id, :channel_id, :month, :message_count, :min_id, :max_id, "
+                ":oldest_message, :newest_message, :total_attachments, :total_embeds, :created_at, 1)",
+                segment,
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO cold_deleted SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM messages WHERE id = ?)",
+                [(segment["channel_id"], message_id, message_id) for message_id in message_ids],
+            )
+
+    def retire_to_cold(self, message_ids):
+        """Move messages of a pending segment from the index to cold search, in one short transaction"""
+        ids = [(message_id,) for message_id in message_ids]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO cold_fts (rowid, content, channel_id, author_id) "
+                "SELECT id, content, channel_id, author_id FROM messages WHERE id = ? AND content != ''",
+                ids,
+            )
+            self.conn.executemany("DELETE FROM messages WHERE id = ?", ids)
+
+    def finish_cold_segment(self, path):
+        """Mark a cold segment complete once all its messages have left the index"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE cold_segments SET pending = 0 WHERE path = ?", (path,))
+
+    def cold_segments(self, guild_id=None, channel_id=None, after_id=None, before_id=None, pending=None):
+        """Get catalogued cold segments that may hold messages matching the filters, oldest first"""
+        conditions = []
+        params = []
+        if pending is not None:
+            conditions.append("pending = ?")
+            params.append(int(pending))
+        for column, value in (("guild_id", guild_id), ("channel_id", channel_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if after_id is not None:
+            conditions.append("max_id > ?")
+            params.append(after_id)
+        if before_id is not None:
+            conditions.append("min_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            cursor = self.conn.execute(f"""
+                SELECT s.*, (
+                    SELECT COUNT(*) FROM cold_deleted d
+                    WHERE d.channel_id = s.channel_id AND d.id BETWEEN s.min_id AND s.max_id
+                ) AS deleted
+                FROM cold_segments s {where} ORDER BY min_id
+            """, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def cold_deleted(self, channel_id, min_id, max_id):
+        """Get the ids of compacted messages in a channel's id range that were deleted since"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT id FROM cold_deleted WHERE channel_id = ? AND id BETWEEN ? AND ?",
+                (channel_id, min_id, max_id),
+            )]
+
+    def save_shard_status(self, shard_id, pid, state, latency, guild_count, updated_at):
+        """Record the health of a shard"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO shard_status VALUES (?, ?, ?, ?, ?, ?)",
+                (shard_id, pid, state, latency, guild_count, updated_at),
+            )
+
+    def shard_statuses(self):
+        """Get the last recorded health of every shard"""
+        with self.lock:
+            cursor = self.conn.execute("SELECT * FROM shard_status ORDER BY shard_id")
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
+
+
+def fts_query(text):
+    """Turn user search text into a safe FTS5 query of quoted terms and phrases"""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if phrase.strip():
+            terms.append('"' + phrase.strip() + '"')
+        elif word:
+            prefix = word.endswith("*") and len(word) > 1
+            word = word.rstrip("*").replace('"', '""')
+            if word:
+                terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def query_terms(text):
+    """Get the lowercase words of user search text as (word, prefix) pairs, for highlighting"""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        words = re.findall(r"\w+", (phrase or word).lower())
+        prefix = bool(word) and word.endswith("*")
+        terms.extend((part, prefix and i == len(words) - 1) for i, part in enumerate(words))
+    return terms
+
+
+def _parse_timestamp(value):
+    """Parse an ISO 8601 timestamp from a gateway payload into epoch seconds"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
@@ -0,0 +1,199 @@
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Route of webhook executions, which is how interaction followups are sent
+FOLLOWUP_PATH = "/webhooks/{webhook_id}/{webhook_token}"
+
+# Name of the command the current task is running, for attributing API calls
+current_command = contextvars.ContextVar("current_command", default="background")
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Cumulative-bucket histogram in the Prometheus style"""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Record one observation"""
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self):
+        """Get (le, cumulative count) pairs including +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class CommandMetrics:
+    def __init__(self):
+        """Per-command latency, in-flight, error and API call metrics"""
+        self.latency = {}
+        self.stages = {}
+        self.counters = {}
+        self.in_flight = {}
+        self.collectors = {}
+        self.runner = None
+
+    def increment(self, name, command=None, amount=1):
+        """Add to a per-command counter (defaults to the current command)"""
+        key = (name, command or current_command.get())
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe_stage(self, stage, seconds, command=None):
+        """Record how long one stage of a command took"""
+        key = (command or current_command.get(), stage)
+        if key not in self.stages:
+            self.stages[key] = Histogram()
+        self.stages[key].observe(seconds)
+
+    @contextmanager
+    def stage(self, stage):
+        """Time a block as a stage of the current command, e.g. "defer" or "history\""""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+
+    def instrument(self, name):
+        """Decorator that records latency, in-flight count and errors of a command callback"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                token = current_command.set(name)
+                self.in_flight[name] = self.in_flight.get(name, 0) + 1
+                self.increment("command_invocations_total", name)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    self.increment("command_errors_total", name)
+                    raise
+                finally:
+                    if name not in self.latency:
+                        self.latency[name] = Histogram()
+                    self.latency[name].observe(time.perf_counter() - start)
+                    self.in_flight[name] -= 1
+                    current_command.reset(token)
+            return wrapper
+        return decorator
+
+    def count_api_calls(self, owner, attribute="request"):
+        """Wrap an HTTP client's request coroutine to count Discord API calls per command"""
+        request = getattr(owner, attribute)
+
+        @functools.wraps(request)
+        async def counted_request(*args, **kwargs):
+            self.increment("discord_api_calls_total")
+            return await request(*args, **kwargs)
+
+        setattr(owner, attribute, counted_request)
+
+    def count_followups(self, adapter):
+        """Wrap a webhook adapter's request coroutine to count sent interaction followups per command
+
+        Every followup goes through the adapter, whether it was queued in
+        SendQueue or sent directly with interaction.followup.send.
+        """
+        request = adapter.request
+
+        @functools.wraps(request)
+        async def counted_request(route, *args, **kwargs):
+            response = await request(route, *args, **kwargs)
+            if route.method == "POST" and route.path == FOLLOWUP_PATH:
+                self.increment("followup_sends_total")
+            return response
+
+        adapter.request = counted_request
+
+    def add_collector(self, prefix, collect):
+        """Export the numeric values of collect() as gauges named prefix_key"""
+        self.collectors[prefix] = collect
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        lines.append("# TYPE command_latency_seconds histogram")
+        for command, histogram in sorted(self.latency.items()):
+            lines.extend(_render_histogram("command_latency_seconds", f'command="{command}"', histogram))
+
+        lines.append("# TYPE command_stage_seconds histogram")
+        for (command, stage), histogram in sorted(self.stages.items()):
+            labels = f'command="{command}",stage="{stage}"'
+            lines.extend(_render_histogram("command_stage_seconds", labels, histogram))
+
+        lines.append("# TYPE command_in_flight gauge")
+        for command, value in sorted(self.in_flight.items()):
+            lines.append(f'command_in_flight{{command="{command}"}} {value}')
+
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (counter, command), value in sorted(self.counters.items()):
+                if counter == name:
+                    lines.append(f'{name}{{command="{command}"}} {value}')
+
+        for prefix, collect in sorted(self.collectors.items()):
+            typed = set()
+            for key, value in collect().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    # Keys may carry labels, e.g. 'latency_seconds{shard="0"}'
+                    name = f"{prefix}_{key.split('{', 1)[0]}"
+                    if name not in typed:
+                        typed.add(name)
+                        lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    async def handle_metrics(self, request):
+        """aiohttp handler serving /metrics"""
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+
+    async def start_server(self, host="127.0.0.1", port=9108):
+        """Serve /metrics over HTTP (no-op if already running)"""
+        if self.runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        print(f"Serving metrics on http://{host}:{port}/metrics")
+
+    async def stop_server(self):
+        """Stop the metrics HTTP server"""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+def _render_histogram(name, labels, histogram):
+    """Render one labelled histogram as Prometheus text lines"""
+    lines = [f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in histogram.cumulative()]
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+# Shared registry used by the bot and its helper modules
+metrics = CommandMetrics()
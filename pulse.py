@@ -0,0 +1,108 @@
+import time
+
+# Minutes of history kept per channel, and the windows /pulse reports
+PULSE_MINUTES = 60
+PULSE_WINDOWS = (5, 15, 60)
+
+
+class ChannelPulse:
+    def __init__(self, minutes=PULSE_MINUTES):
+        """Fixed-size ring buffer of per-minute message counts and authors for one channel"""
+        self.size = minutes
+        self.stamps = [-1] * minutes
+        self.counts = [0] * minutes
+        self.authors = [None] * minutes
+        self.last_minute = -1
+
+    def record(self, author_id, now):
+        """Count one message in the slot for the current minute (O(1))"""
+        minute = int(now // 60)
+        slot = minute % self.size
+        if self.stamps[slot] != minute:
+            # The slot still holds a minute that has left the window
+            self.stamps[slot] = minute
+            self.counts[slot] = 0
+            self.authors[slot] = set()
+        self.counts[slot] += 1
+        self.authors[slot].add(author_id)
+        self.last_minute = minute
+
+    def window(self, minutes, now):
+        """Get message count, messages per minute and distinct authors over the last minutes"""
+        current = int(now // 60)
+        messages = 0
+        authors = set()
+        for slot in range(self.size):
+            if current - minutes < self.stamps[slot] <= current:
+                messages += self.counts[slot]
+                authors |= self.authors[slot]
+        return {"messages": messages, "per_minute": messages / minutes, "authors": len(authors)}
+
+    def idle(self, now):
+        """Whether nothing was recorded within the buffer's span"""
+        return int(now // 60) - self.last_minute >= self.size
+
+
+class PulseTracker:
+    def __init__(self, minutes=PULSE_MINUTES):
+        """Rolling real-time activity of every channel, updated from gateway events"""
+        self.minutes = minutes
+        self.guilds = {}
+        self.swept_at = time.time()
+
+    def record_message(self, guild_id, channel_id, author_id, now=None):
+        """Count a new message towards its channel's pulse"""
+        now = time.time() if now is None else now
+        channels = self.guilds.setdefault(guild_id, {})
+        pulse = channels.get(channel_id)
+        if pulse is None:
+            pulse = channels[channel_id] = ChannelPulse(self.minutes)
+        pulse.record(author_id, now)
+        if now - self.swept_at >= self.minutes * 60:
+            self.sweep(now)
+
+    def sweep(self, now):
+        """Drop the buffers of channels that have gone idle, so memory follows active channels"""
+        self.swept_at = now
+        for guild_id, channels in list(self.guilds.items()):
+            for channel_id in [channel_id for channel_id, pulse in channels.items() if pulse.idle(now)]:
+                del channels[channel_id]
+            if not channels:
+                del self.guilds[guild_id]
+
+    def channel_pulse(self, guild_id, channel_id, windows=PULSE_WINDOWS, now=None):
+        """Get a channel's activity per window, or None if it has been idle"""
+        now = time.time() if now is None else now
+        pulse = self.guilds.get(guild_id, {}).get(channel_id)
+        if pulse is None or pulse.idle(now):
+            return None
+        return {minutes: pulse.window(minutes, now) for minutes in windows}
+
+    def guild_pulse(self, guild_id, windows=PULSE_WINDOWS, now=None):
+        """Get (channel_id, activity per window) for a guild's active channels, busiest first"""
+        now = time.time() if now is None else now
+        results = [
+            (channel_id, {minutes: pulse.window(minutes, now) for minutes in windows})
+            for channel_id, pulse in self.guilds.get(guild_id, {}).items()
+            if not pulse.idle(now)
+        ]
+        return sorted(results, key=lambda item: [item[1][minutes]["messages"] for minutes in windows], reverse=True)
+
+    def discard(self, guild_id):
+        """Forget a guild's channels (e.g. after leaving it)"""
+        self.guilds.pop(guild_id, None)
+
+    def stats(self):
+        """Get the number of tracked guilds and channels"""
+        return {
+            "guilds": len(self.guilds),
+            "channels": sum(len(channels) for channels in self.guilds.values())
+        }
+
+
+def format_pulse(windows):
+    """Format one channel's activity as "5m 3.2/min · 4 author(s) | 15m ...\""""
+    return " | ".join(
+        f"{minutes}m {activity['per_minute']:.1f}/min · {activity['authors']} author(s)"
+        for minutes, activity in windows.items()
+    )
@@ -0,0 +1,160 @@
+from datetime import datetime, timezone
+
+
+class MessageRecord:
+    """Compact message record shared by the bot and the scraper
+
+    Uses __slots__ instead of a per-message dict, keeps ids as ints and the
+    creation time as epoch seconds, and only builds the JSON-style dict when
+    a record is serialized.
+    """
+
+    __slots__ = (
+        "message_id", "channel_id", "author_id", "author_name", "content",
+        "created_at", "attachments", "embeds", "reactions"
+    )
+
+    def __init__(self, content="", created_at=None, message_id=None, channel_id=None,
+                 author_id=None, author_name=None, attachments=0, embeds=None, reactions=0):
+        """Create a record; created_at is epoch seconds, or the raw text when it can't be parsed"""
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+        self.created_at = created_at
+        self.attachments = attachments
+        self.embeds = embeds
+        self.reactions = reactions
+
+    @classmethod
+    def from_message(cls, message):
+        """Build a record from a discord.Message"""
+        return cls(
+            content=message.content,
+            created_at=message.created_at.timestamp(),
+            message_id=message.id,
+            channel_id=message.channel.id,
+            author_id=message.author.id,
+            attachments=len(message.attachments),
+            embeds=len(message.embeds),
+            reactions=sum(reaction.count for reaction in message.reactions)
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from a message index row"""
+        return cls(
+            content=row["content"],
+            created_at=row["created_at"],
+            message_id=row["id"],
+            channel_id=row["channel_id"],
+            author_id=row["author_id"],
+            attachments=row["attachments"],
+            embeds=row["embeds"],
+            reactions=row["reactions"]
+        )
+
+    @staticmethod
+    def parse_timestamp(value):
+        """Convert an ISO 8601 string to epoch seconds, keeping unparseable text as is"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return value
+
+    @property
+    def created_datetime(self):
+        """Creation time as an aware UTC datetime, or None if unknown"""
+        if isinstance(self.created_at, (int, float)):
+            return datetime.fromtimestamp(self.created_at, timezone.utc)
+        return None
+
+    @property
+    def timestamp(self):
+        """Creation time as an ISO 8601 string"""
+        created = self.created_datetime
+        if created is not None:
+            return created.isoformat()
+        return self.created_at or ""
+
+    def to_dict(self):
+        """Serialize to the dict format used by JSON exports"""
+        data = {}
+        if self.author_name is not None:
+            data["username"] = self.author_name
+        if self.author_id is not None:
+            data["author_id"] = str(self.author_id)
+        data["content"] = self.content
+        data["timestamp"] = self.timestamp
+        if self.message_id is not None:
+            data["message_id"] = str(self.message_id)
+        data["attachments"] = self.attachments
+        if self.embeds is not None:
+            data["embeds"] = self.embeds
+        data["reactions"] = self.reactions
+        return data
+
+    def __repr__(self):
+        return f"MessageRecord(message_id={self.message_id!r}, author_id={self.author_id!r}, created_at={self.created_at!r})"
+
+
+def record_default(obj):
+    """json.dump(s) default hook that serializes MessageRecords lazily"""
+    if isinstance(obj, MessageRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def benchmark(count=100000):
+    """Compare memory use of per-message dicts against MessageRecords"""
+    import tracemalloc
+
+    content = "Sample message content"
+    base_id = 1100000000000000000
+    base_time = 1700000000.0
+
+    def build_dicts():
+        return [
+            {
+                "content": content,
+                "timestamp": datetime.fromtimestamp(base_time + i, timezone.utc).isoformat(),
+                "message_id": str(base_id + i),
+                "attachments": 0,
+                "embeds": 0,
+                "reactions": i % 3
+            }
+            for i in range(count)
+        ]
+
+    def build_records():
+        return [
+            MessageRecord(
+                content=content,
+                created_at=base_time + i,
+                message_id=base_id + i,
+                attachments=0,
+                embeds=0,
+                reactions=i % 3
+            )
+            for i in range(count)
+        ]
+
+    results = {}
+    for name, build in (("dict", build_dicts), ("MessageRecord", build_records)):
+        tracemalloc.start()
+        data = build()
+        results[name] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del data
+    return results
+
+
+if __name__ == "__main__":
+    count = 100000
+    results = benchmark(count)
+    for name, size in results.items():
+        print(f"{name:>14}: {size / count:7.1f} bytes/message")
+    print(f"Saving: {1 - results['MessageRecord'] / results['dict']:.0%}")
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+MESSAGE_LIMIT = 2000
+
+
+def paginate(text, limit=MESSAGE_LIMIT):
+    """Split text into as few chunks of at most limit characters as possible
+
+    Chunks break on line boundaries. A single line longer than limit is split
+    on the last space before the limit, and only cut mid-word if it has none,
+    so mentions and links stay whole.
+    """
+    pages = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit)
+            if cut <= 0:
+                cut = limit
+            else:
+                cut += 1
+            if current:
+                pages.append(current)
+                current = ""
+            pages.append(line[:cut])
+            line = line[cut:]
+        if len(current) + len(line) > limit:
+            pages.append(current)
+            current = ""
+        current += line
+    if current.strip():
+        pages.append(current)
+    return [page for page in pages if page.strip()]
+
+
+class TokenBucket:
+    def __init__(self, rate, per):
+        """Allow rate requests every per seconds"""
+        self.rate = rate
+        self.per = per
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def delay(self):
+        """Get how long to wait before the next request may go out"""
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        if self.tokens < 1:
+            return (1 - self.tokens) * self.per / self.rate
+        return 0.0
+
+    def consume(self):
+        """Take a token for a request that is going out now"""
+        self.tokens -= 1
+
+
+class SendQueue:
+    def __init__(self, rate=5, per=2.0, idle_timeout=30.0):
+        """FIFO send queues per destination, paced by per-destination rate-limit buckets"""
+        self.rate = rate
+        self.per = per
+        self.idle_timeout = idle_timeout
+        self.queues = {}
+        self.buckets = {}
+        self.workers = {}
+        self.sent = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def send(self, destination, send, *args, **kwargs):
+        """Queue send(*args, **kwargs) for a destination and wait for its result
+
+        destination is any hashable key naming the rate-limit bucket, e.g. an
+        interaction token for followups or a channel id.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if destination not in self.queues:
+            self.queues[destination] = asyncio.Queue()
+            self.buckets[destination] = TokenBucket(self.rate, self.per)
+        await self.queues[destination].put((time.monotonic(), future, send, args, kwargs))
+        worker = self.workers.get(destination)
+        if worker is None or worker.done():
+            self.workers[destination] = asyncio.create_task(self.worker(destination))
+        return await future
+
+    async def send_pages(self, destination, send, text, **kwargs):
+        """Paginate text on line boundaries and queue one send per page"""
+        results = []
+        for page in paginate(text):
+            results.append(await self.send(destination, send, page, **kwargs))
+        return results
+
+    async def followup(self, interaction, content=None, **kwargs):
+        """Queue an interaction followup; long text content is paginated"""
+        if content is None:
+            return await self.send(interaction.token, interaction.followup.send, **kwargs)
+        if len(content) > MESSAGE_LIMIT:
+            return await self.send_pages(interaction.token, interaction.followup.send, content, **kwargs)
+        return await self.send(interaction.token, interaction.followup.send, content, **kwargs)
+
+    async def worker(self, destination):
+        """Drain one destination's queue, pacing sends by its bucket"""
+        queue = self.queues[destination]
+        bucket = self.buckets[destination]
+        while True:
+            try:
+                queued_at, future, send, args, kwargs = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Idle destinations (e.g. expired interaction tokens) are dropped
+                if queue.empty():
+                    del self.queues[destination]
+                    del self.buckets[destination]
+                    self.workers.pop(destination, None)
+                    return
+                continue
+            delay = bucket.delay()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = bucket.delay()
+            bucket.consume()
+            waited = time.monotonic() - queued_at
+            self.wait_count += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            # No retry here: the webhook adapter already waits out 429s and
+            # only raises one for a Cloudflare ban, and a retry would re-send
+            # files the first attempt consumed
+            try:
+                result = await send(*args, **kwargs)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.sent += 1
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        """Get queue depth and wait-time metrics"""
+        return {
+            "destinations": len(self.queues),
+            "queue_depth": sum(queue.qsize() for queue in self.queues.values()),
+            "sent": self.sent,
+            "wait_avg": self.wait_total / self.wait_count if self.wait_count else 0.0,
+            "wait_max": self.wait_max
+        }
@@ -0,0 +1,147 @@
+"""Multi-process launcher for the sharded bot
+
+Splits the bot's shards into contiguous ranges and runs one bot.py worker
+process per range, restarting workers that exit unexpectedly:
+
+    python sharding.py --processes 4
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+
+def parse_shard_ids(text):
+    """Parse a shard id list such as "0-3,8,10-11" into a sorted list of ints"""
+    shard_ids = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            shard_ids.update(range(int(first), int(last) + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids)
+
+
+def split_shards(shard_count, processes):
+    """Split shard ids 0..shard_count-1 into at most processes contiguous ranges"""
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for i in range(processes):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def format_shard_ids(shard_ids):
+    """Format a contiguous shard id list as "first-last" for the SHARD_IDS variable"""
+    return f"{shard_ids[0]}-{shard_ids[-1]}" if len(shard_ids) > 1 else str(shard_ids[0])
+
+
+async def fetch_recommended_shards(token):
+    """Ask the gateway how many shards Discord recommends for this bot"""
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_BOT_URL, headers=headers) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"]
+
+
+def shard_latencies(bot):
+    """Get (shard_id, latency seconds) pairs for a sharded or unsharded bot"""
+    if hasattr(bot, "latencies"):
+        return bot.latencies
+    return [(bot.shard_id or 0, bot.latency)]
+
+
+def worker_env(index, shard_ids, shard_count):
+    """Environment for one worker process"""
+    env = dict(os.environ)
+    env["SHARD_COUNT"] = str(shard_count)
+    env["SHARD_IDS"] = format_shard_ids(shard_ids)
+    env["WORKER_INDEX"] = str(index)
+    # Each worker serves metrics on its own port
+    metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+    env["METRICS_PORT"] = str(metrics_port + index) if metrics_port else "0"
+    return env
+
+
+def run_workers(shard_ranges, shard_count, restart_delay=5.0):
+    """Run one bot.py process per shard range until interrupted, restarting crashed workers"""
+    bot_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+    workers = {}
+    stopping = False
+
+    def start(index):
+        shard_ids = shard_ranges[index]
+        print(f"Starting worker {index} for shards {format_shard_ids(shard_ids)} of {shard_count}")
+        workers[index] = subprocess.Popen([sys.executable, bot_path], env=worker_env(index, shard_ids, shard_count))
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(len(shard_ranges)):
+        start(index)
+        # IDENTIFY is rate limited; stagger worker logins
+        time.sleep(restart_delay)
+
+    while not stopping:
+        for index, process in list(workers.items()):
+            code = process.poll()
+            if code is not None and not stopping:
+                print(f"Worker {index} exited with code {code}, restarting in {restart_delay:.0f}s")
+                time.sleep(restart_delay)
+                start(index)
+        time.sleep(1)
+
+    print("Stopping workers...")
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    """Work out the shard layout and launch the worker processes"""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the bot as several sharded worker processes")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-count", type=int, default=None,
+                        help="total shards (default: Discord's recommendation)")
+    args = parser.parse_args()
+
+    token = os.getenv("DISCORD_BOT_TOKEN")
+    if not token:
+        print("Error: DISCORD_BOT_TOKEN not found in environment variables!")
+        return
+
+    shard_count = args.shard_count or asyncio.run(fetch_recommended_shards(token))
+    shard_ranges = split_shards(shard_count, args.processes)
+    print(f"Running {shard_count} shard(s) in {len(shard_ranges)} process(es)")
+    run_workers(shard_ranges, shard_count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import time
+
+
+class StartupTimeline:
+    def __init__(self, started_at):
+        """Record how long each cold-start phase took, relative to process start"""
+        self.started_at = started_at
+        self.marks = {}
+
+    def mark(self, phase):
+        """Record that a phase finished now (only the first time)"""
+        if phase not in self.marks:
+            self.marks[phase] = time.monotonic() - self.started_at
+
+    def report(self):
+        """Format the timeline, e.g. "imports 0.4s → login 1.1s → ready 3.2s\""""
+        return " → ".join(f"{phase} {seconds:.1f}s" for phase, seconds in self.marks.items())
+
+    def stats(self):
+        """Get the timeline as metrics"""
+        return {f"{phase}_seconds": seconds for phase, seconds in self.marks.items()}
+
+
+def tree_hash(tree, guild=None):
+    """Hash the payloads of the commands registered for a scope of the command tree"""
+    payloads = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda payload: payload["name"]
+    )
+    encoded = json.dumps(payloads, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def load_manifest(path):
+    """Load the command manifest, or an empty one if it is missing or unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    """Atomically write the command manifest"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+async def sync_if_changed(bot, manifest_path, guild=None, force=False):
+    """Sync a command tree scope only if its hash differs from the last synced one
+
+    The manifest is keyed by application id and scope ("global" or a guild
+    id), so switching bots or dev guilds triggers a sync. Returns the number
+    of synced commands, or None if the sync was skipped.
+    """
+    scope = str(guild.id) if guild else "global"
+    key = f"{bot.application_id}:{scope}"
+    digest = tree_hash(bot.tree, guild)
+    manifest = load_manifest(manifest_path)
+    if not force and manifest.get(key) == digest:
+        return None
+    synced = await bot.tree.sync(guild=guild)
+    manifest[key] = digest
+    save_manifest(manifest_path, manifest)
+    return len(synced)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+
+class ChannelStatsCache:
+    def __init__(self, index, ttl=60.0, approximate=False, cold=None):
+        """Per-channel channel_stats aggregates, refreshed by folding in only new rows
+
+        With approximate=True, authors are counted with mergeable HyperLogLog
+        sketches instead of sets of every author id. With a ColdStore, totals
+        include messages compacted out of the index.
+        """
+        self.index = index
+        self.ttl = ttl
+        self.approximate = approximate
+        self.cold = cold
+        self.entries = {}
+        self.hits = 0
+        self.refreshes = 0
+        self.misses = 0
+
+    async def get(self, channel_id):
+        """Get a channel's aggregates, folding in rows indexed since the last refresh
+
+        Index and cold storage reads run in a worker thread, so the event
+        loop doesn't wait while compaction holds the index lock.
+        """
+        entry = self.entries.get(channel_id)
+        now = time.monotonic()
+        if entry is None:
+            self.misses += 1
+            entry = await asyncio.to_thread(self.index.range_stats, channel_id, approximate=self.approximate)
+            if self.cold is not None:
+                self.fold(entry, await asyncio.to_thread(self.cold.channel_totals, channel_id, self.approximate))
+            entry["refreshed_at"] = now
+            self.entries[channel_id] = entry
+        elif now - entry["refreshed_at"] < self.ttl:
+            self.hits += 1
+        else:
+            self.refreshes += 1
+            if entry["newest_id"] is None:
+                # Nothing was indexed last time, so there is no range to extend
+                delta = await asyncio.to_thread(self.index.range_stats, channel_id, approximate=self.approximate)
+            else:
+                # Newer messages from gateway events and catch-up, plus older
+                # ones the backfill has paged in since
+                delta = await asyncio.to_thread(
+                    self.index.range_stats,
+                    channel_id,
+                    outside=(entry["oldest_id"], entry["newest_id"]),
+                    approximate=self.approximate
+                )
+            self.fold(entry, delta)
+            entry["refreshed_at"] = now
+        return self.snapshot(entry)
+
+    def fold(self, entry, delta):
+        """Add the aggregates of newly indexed rows to a cached entry"""
+        entry["message_count"] += delta["message_count"]
+        if self.approximate:
+            entry["authors"].merge(delta["authors"])
+        else:
+            entry["authors"] |= delta["authors"]
+        entry["total_attachments"] += delta["total_attachments"]
+        entry["total_embeds"] += delta["total_embeds"]
+        for key, pick in (("oldest_id", min), ("newest_id", max), ("oldest_message", min)):
+            values = [value for value in (entry[key], delta[key]) if value is not None]
+            entry[key] = pick(values) if values else None
+
+    def snapshot(self, entry):
+        """Get the channel_stats view of a cached entry"""
+        return {
+            "message_count": entry["message_count"],
+            "unique_authors": entry["authors"].count() if self.approximate else len(entry["authors"]),
+            "approximate": self.approximate,
+            "total_attachments": entry["total_attachments"],
+            "total_embeds": entry["total_embeds"],
+            "oldest_message": entry["oldest_message"],
+            "authors": entry["authors"]
+        }
+
+    def invalidate(self, channel_id):
+        """Drop a channel's aggregates after edits or deletes changed old rows"""
+        self.entries.pop(channel_id, None)
+
+    def clear(self):
+        """Drop all aggregates (events may have been missed before a new READY)"""
+        self.entries.clear()
+
+    def stats(self):
+        """Get cache size and hit/refresh/miss counters"""
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "misses": self.misses
+        }
@@ -0,0 +1,89 @@
+import asyncio
+import re
+from collections import Counter
+
+# Lowercase words (letters, digits, apostrophes), ignoring URLs and mentions
+WORD_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+STRIP_RE = re.compile(r"https?://\S+|<[@#:a]?[!&]?[\w:]*>")
+CUSTOM_EMOJI_RE = re.compile(r"<a?:(\w+):\d+>")
+# Common pictographic emoji ranges; skin tone and joiner sequences count per base emoji
+EMOJI_RE = re.compile(
+    "[\U0001F1E6-\U0001F1FF\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF"
+    "\U0001F900-\U0001FAFF☀-➿⭐⭕]"
+)
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been but by can could did do does
+don't for from get got had has have he her him his how i i'm if in into is it it's its
+just like me my no not of on one or our out she so some than that that's the their them
+then there they this to too up us was we were what when which who will with would you your
+""".split())
+
+# Messages per batch handed to a worker process
+CHUNK_SIZE = 2000
+
+
+def count_batch(contents):
+    """Tokenize a batch of message contents and count words, bigrams and emoji
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    """
+    words = Counter()
+    bigrams = Counter()
+    emoji = Counter()
+    characters = 0
+    messages = 0
+    for content in contents:
+        if not content:
+            continue
+        messages += 1
+        characters += len(content)
+        for name in CUSTOM_EMOJI_RE.findall(content):
+            emoji[f":{name}:"] += 1
+        emoji.update(EMOJI_RE.findall(content))
+        tokens = WORD_RE.findall(STRIP_RE.sub(" ", content).lower())
+        words.update(token for token in tokens if token not in STOPWORDS and len(token) > 1)
+        bigrams.update(
+            f"{first} {second}" for first, second in zip(tokens, tokens[1:])
+            if not (first in STOPWORDS and second in STOPWORDS)
+        )
+    return {"words": words, "bigrams": bigrams, "emoji": emoji, "characters": characters, "messages": messages}
+
+
+def merge_counts(results):
+    """Combine count_batch() results from several batches"""
+    total = {"words": Counter(), "bigrams": Counter(), "emoji": Counter(), "characters": 0, "messages": 0}
+    for result in results:
+        total["words"].update(result["words"])
+        total["bigrams"].update(result["bigrams"])
+        total["emoji"].update(result["emoji"])
+        total["characters"] += result["characters"]
+        total["messages"] += result["messages"]
+    return total
+
+
+async def text_insights(executor, contents, top=10, chunk_size=CHUNK_SIZE):
+    """Count words, bigrams and emoji over message contents in an executor
+
+    The contents are split into chunks counted in parallel by the executor's
+    workers (a ProcessPoolExecutor keeps the tokenizing off the event loop
+    and out of the GIL). Returns the top entries and average message length.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = [contents[i:i + chunk_size] for i in range(0, len(contents), chunk_size)]
+    results = await asyncio.gather(*(loop.run_in_executor(executor, count_batch, chunk) for chunk in chunks))
+    total = merge_counts(results)
+    return {
+        "messages": total["messages"],
+        "average_length": total["characters"] / total["messages"] if total["messages"] else 0.0,
+        "words": total["words"].most_common(top),
+        "bigrams": total["bigrams"].most_common(top),
+        "emoji": total["emoji"].most_common(top)
+    }
+
+
+def format_ranking(pairs):
+    """Format (item, count) pairs as a numbered list"""
+    if not pairs:
+        return "None"
+    return "\n".join(f"{i}. {item} ({count})" for i, (item, count) in enumerate(pairs, 1))
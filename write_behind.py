@@ -0,0 +1,200 @@
+import asyncio
+import sqlite3
+import time
+
+from metrics import metrics
+
+
+class WriteBehindBuffer:
+    def __init__(self, index, max_batch=500, flush_interval=1.0, max_pending=10000, on_flush=None,
+                 retry_delay=0.5, max_retry_delay=30.0, max_retries=10):
+        """Buffer gateway events and write them to the index in batched transactions
+
+        A batch is flushed once it holds max_batch events or its oldest event
+        is flush_interval seconds old. When max_pending events are waiting,
+        put() blocks until the writer catches up (backpressure). on_flush is
+        called with the ids of channels whose existing rows a batch changed.
+        A batch that fails because the database is locked or busy is retried
+        with exponential backoff, from retry_delay up to max_retry_delay
+        seconds between attempts, at most max_retries times.
+        """
+        self.index = index
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_retries = max_retries
+        self.queue = None
+        self.task = None
+        self.closing = False
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0
+        self.retries = 0
+        self.backpressure_waits = 0
+        self.last_flush_seconds = 0.0
+
+    def start(self):
+        """Start the flush task if it isn't running"""
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def put(self, kind, args, channel_id=None):
+        """Buffer one event (see MessageIndex.apply_events for the kinds)"""
+        event = (kind, args, channel_id)
+        if self.closing:
+            # Shutting down: write straight through so nothing is lost
+            await self.flush([event])
+            return
+        self.start()
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.backpressure_waits += 1
+            await self.queue.put(event)
+
+    async def add_message(self, message):
+        """Buffer a new message"""
+        await self.put("message", self.index.message_row(message))
+
+    async def edit_message(self, channel_id, message_id, data):
+        """Buffer a raw MESSAGE_UPDATE payload"""
+        fields = self.index.edit_fields(data)
+        if fields:
+            await self.put("edit", (message_id, fields), channel_id)
+
+    async def delete_messages(self, channel_id, message_ids):
+        """Buffer message deletions"""
+        for message_id in message_ids:
+            await self.put("delete", (message_id, channel_id), channel_id)
+
+    async def add_reaction(self, message_id, delta=1):
+        """Buffer a reaction count change"""
+        await self.put("reaction", (delta, message_id))
+
+    async def clear_reactions(self, message_id):
+        """Buffer the removal of all reactions from a message"""
+        await self.put("reaction_clear", (message_id,))
+
+    async def next_batch(self):
+        """Wait for the next batch: up to max_batch events, at most flush_interval after the first
+
+        Returns (batch, stop); stop is set once the shutdown marker is reached.
+        """
+        first = await self.queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                event = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if event is None:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    async def flush(self, batch):
+        """Write one batch in a single transaction off the event loop
+
+        While a batch is being retried nothing else is dequeued, so the queue
+        fills up and put() applies backpressure instead of events being lost.
+        Other errors (e.g. a disk I/O error or a malformed event), or running
+        out of retries, drop the batch.
+        """
+        events = [(kind, args) for kind, args, _ in batch]
+        delay = self.retry_delay
+        attempts = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.index.apply_events, events)
+                break
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempts >= self.max_retries:
+                    self.failed += len(batch)
+                    print(f"Write-behind flush of {len(batch)} event(s) failed: {e}")
+                    return
+                # The transaction was rolled back, so the whole batch can be retried
+                attempts += 1
+                self.retries += 1
+                print(f"Write-behind flush of {len(batch)} event(s) failed, retrying in {delay:.1f}s: {e}")
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Write-behind flush of {len(batch)} event(s) failed: {e}")
+                return
+            finally:
+                self.last_flush_seconds = time.perf_counter() - start
+                metrics.observe_stage("flush", self.last_flush_seconds, command="write_behind")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+        self.flushed += len(batch)
+        self.batches += 1
+        if self.on_flush:
+            for channel_id in {channel_id for _, _, channel_id in batch if channel_id is not None}:
+                self.on_flush(channel_id)
+
+    async def run(self):
+        """Flush batches until the shutdown marker is reached"""
+        while True:
+            batch, stop = await self.next_batch()
+            if batch:
+                await self.flush(batch)
+            if stop:
+                return
+
+    async def close(self):
+        """Write everything still buffered, then stop the flush task
+
+        The flush task is stopped with a marker queued behind the buffered
+        events rather than cancelled, so no dequeued batch is dropped. Events
+        arriving during shutdown are written straight through.
+        """
+        self.closing = True
+        if self.task is not None and not self.task.done():
+            await self.queue.put(None)
+            await self.task
+        self.task = None
+        # The flush task wasn't running: write what it left behind
+        while self.queue is not None and not self.queue.empty():
+            batch = []
+            while len(batch) < self.max_batch and not self.queue.empty():
+                event = self.queue.get_nowait()
+                if event is not None:
+                    batch.append(event)
+            if batch:
+                await self.flush(batch)
+
+    def stats(self):
+        """Get queue depth, flush counters and the last flush latency"""
+        return {
+            "pending": self.queue.qsize() if self.queue is not None else 0,
+            "max_pending": self.max_pending,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed": self.failed,
+            "retries": self.retries,
+            "backpressure_waits": self.backpressure_waits,
+            "last_flush_seconds": self.last_flush_seconds
+        }
+
+
+def is_busy(error):
+    """Whether a SQLite error is a lock conflict with another connection, which a retry can get past"""
+    name = getattr(error, "sqlite_errorname", "")
+    if name:
+        return name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED"))
+    message = str(error)
+    return "locked" in message or "busy" in message